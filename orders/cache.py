@@ -0,0 +1,25 @@
+from django.core.cache import cache
+
+
+# =============================================================
+# CART SUMMARY (header badge)
+# =============================================================
+# Dropped by every cart mutation view; the timeout only bounds how long
+# a product price change can take to show up in the badge.
+CART_SUMMARY_TIMEOUT = 10 * 60
+
+
+def _cart_summary_key(user_id):
+    return f"orders:cart-summary:{user_id}"
+
+
+def get_cart_summary(user_id):
+    return cache.get(_cart_summary_key(user_id))
+
+
+def set_cart_summary(user_id, data):
+    cache.set(_cart_summary_key(user_id), data, CART_SUMMARY_TIMEOUT)
+
+
+def invalidate_cart_summary(user_id):
+    cache.delete(_cart_summary_key(user_id))
@@ -0,0 +1,287 @@
+from collections import defaultdict
+from itertools import groupby
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from products.models import Product
+
+from .models import Cart
+
+
+# Backends with INSERT ... ON CONFLICT DO UPDATE ... RETURNING
+UPSERT_VENDORS = ("postgresql", "sqlite")
+
+
+# =============================================================
+# ADD (UPSERT)
+# =============================================================
+ADD_LINE_SELECT = f"SELECT %s, id, %s, %s, %s FROM {Product._meta.db_table} WHERE id = %s"
+
+ADD_TO_CART_SQL = f"""
+    INSERT INTO {Cart._meta.db_table} (user_id, product_id, size, quantity, added_at)
+    {{selects}}
+    ON CONFLICT (user_id, product_id, size)
+    DO UPDATE SET quantity = {Cart._meta.db_table}.quantity + excluded.quantity
+    RETURNING id, quantity
+"""
+
+
+def add_lines(user_id, lines):
+    """
+    Insert each line or add to its quantity, all in ONE statement.
+    lines: {(product_id, size): quantity}; keys must be distinct because
+    ON CONFLICT cannot update the same row twice.
+    The INSERT ... SELECT doubles as the product existence check, so
+    lines for unknown products are skipped.
+
+    Returns [(cart_id, quantity), ...] for the lines written.
+    """
+    if not lines:
+        return []
+
+    if connection.vendor in UPSERT_VENDORS:
+        now = timezone.now()
+        params = []
+        for (product_id, size), quantity in lines.items():
+            params += [user_id, size, quantity, now, product_id]
+
+        sql = ADD_TO_CART_SQL.format(
+            selects=" UNION ALL ".join([ADD_LINE_SELECT] * len(lines))
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    rows = []
+    with transaction.atomic():
+        for (product_id, size), quantity in lines.items():
+            row = _add_to_cart_fallback(user_id, product_id, size, quantity)
+            if row is not None:
+                rows.append(row)
+    return rows
+
+
+def add_to_cart(user_id, product_id, size, quantity):
+    """
+    Returns (cart_id, quantity), or None when the product does not exist.
+    """
+    rows = add_lines(user_id, {(product_id, size): quantity})
+    return rows[0] if rows else None
+
+
+def _add_to_cart_fallback(user_id, product_id, size, quantity):
+    lookup = {"user_id": user_id, "product_id": product_id, "size": size}
+
+    with transaction.atomic():
+        if not Cart.objects.filter(**lookup).update(quantity=F("quantity") + quantity):
+            if not Product.objects.filter(id=product_id).exists():
+                return None
+            try:
+                with transaction.atomic():
+                    Cart.objects.create(quantity=quantity, **lookup)
+            except IntegrityError:
+                # A concurrent request inserted the row first
+                Cart.objects.filter(**lookup).update(quantity=F("quantity") + quantity)
+
+        return Cart.objects.filter(**lookup).values_list("id", "quantity").get()
+
+
+# =============================================================
+# SET QUANTITY / REMOVE
+# =============================================================
+def set_quantities(user_id, quantities):
+    """
+    {cart_id: quantity} in one UPDATE; quantities below 1 remove the line.
+    """
+    removals = [cart_id for cart_id, quantity in quantities.items() if quantity < 1]
+    updates = {cart_id: quantity for cart_id, quantity in quantities.items() if quantity >= 1}
+
+    if updates:
+        Cart.objects.filter(user_id=user_id, id__in=updates).update(
+            quantity=Case(
+                *[When(id=cart_id, then=Value(quantity)) for cart_id, quantity in updates.items()],
+                output_field=IntegerField()
+            )
+        )
+    remove_lines(user_id, removals)
+
+
+def remove_lines(user_id, cart_ids):
+    if cart_ids:
+        Cart.objects.filter(user_id=user_id, id__in=cart_ids).delete()
+
+
+# =============================================================
+# CHANGE SIZE (MERGE)
+# =============================================================
+# One statement: lock the source row, then either add its quantity to an
+# existing line of the new size (and delete it) or move it to the new size
+# in place. Every CTE sees the same snapshot; `removed` and `moved` are
+# mutually exclusive on whether `merged` touched a row.
+CHANGE_SIZE_SQL = f"""
+    WITH src AS (
+        SELECT id, user_id, product_id, quantity FROM {Cart._meta.db_table}
+        WHERE id = %(cart_id)s AND user_id = %(user_id)s
+          AND size IS DISTINCT FROM %(size)s
+        FOR UPDATE
+    ),
+    merged AS (
+        UPDATE {Cart._meta.db_table} AS target
+        SET quantity = target.quantity + src.quantity
+        FROM src
+        WHERE target.user_id = src.user_id
+          AND target.product_id = src.product_id
+          AND target.size = %(size)s
+        RETURNING target.id, target.quantity
+    ),
+    removed AS (
+        DELETE FROM {Cart._meta.db_table}
+        WHERE id IN (SELECT id FROM src) AND EXISTS (SELECT 1 FROM merged)
+        RETURNING id
+    ),
+    moved AS (
+        UPDATE {Cart._meta.db_table} SET size = %(size)s
+        WHERE id IN (SELECT id FROM src) AND NOT EXISTS (SELECT 1 FROM merged)
+        RETURNING id, quantity
+    )
+    SELECT id, quantity FROM merged
+    UNION ALL
+    SELECT id, quantity FROM moved
+"""
+
+
+def change_cart_size(user_id, cart_id, size):
+    """
+    Move a cart line to another size, merging into an existing line of
+    that size. Returns the (cart_id, quantity) that now holds the items,
+    or None when the line does not belong to the user.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                CHANGE_SIZE_SQL,
+                {"cart_id": cart_id, "user_id": user_id, "size": size}
+            )
+            row = cursor.fetchone()
+
+        if row is not None:
+            return row
+        # Nothing moved: either not the user's line, or already that size
+        return Cart.objects.filter(
+            id=cart_id, user_id=user_id
+        ).values_list("id", "quantity").first()
+
+    return _change_cart_size_fallback(user_id, cart_id, size)
+
+
+def _change_cart_size_fallback(user_id, cart_id, size):
+    with transaction.atomic():
+        item = (
+            Cart.objects.select_for_update()
+            .filter(id=cart_id, user_id=user_id)
+            .values("product_id", "size", "quantity")
+            .first()
+        )
+        if item is None:
+            return None
+        if item["size"] == size:
+            return cart_id, item["quantity"]
+
+        target = {"user_id": user_id, "product_id": item["product_id"], "size": size}
+        merged = Cart.objects.filter(**target).update(
+            quantity=F("quantity") + item["quantity"]
+        )
+        if merged:
+            Cart.objects.filter(id=cart_id).delete()
+            return Cart.objects.filter(**target).values_list("id", "quantity").get()
+
+        Cart.objects.filter(id=cart_id).update(size=size)
+        return cart_id, item["quantity"]
+
+
+# =============================================================
+# BATCH
+# =============================================================
+CART_BATCH_LIMIT = 100
+
+
+def _positive_int(value, name, minimum=1):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+    if value < minimum:
+        raise ValueError(f"Invalid {name}")
+    return value
+
+
+def parse_operation(raw):
+    """
+    {"op": "add", "product_id", "size", "quantity"}
+    {"op": "set_quantity", "cart_id", "quantity"}   (quantity 0 removes)
+    {"op": "change_size", "cart_id", "size"}
+    {"op": "remove", "cart_id"}
+    Raises ValueError with a client-facing message.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("Each operation must be an object")
+
+    op = raw.get("op")
+    if op == "add":
+        if not raw.get("size"):
+            raise ValueError("add requires size")
+        return op, (
+            _positive_int(raw.get("product_id"), "product_id"),
+            raw["size"],
+            _positive_int(raw.get("quantity", 1), "quantity"),
+        )
+    if op == "set_quantity":
+        return op, (
+            _positive_int(raw.get("cart_id"), "cart_id"),
+            _positive_int(raw.get("quantity"), "quantity", minimum=0),
+        )
+    if op == "change_size":
+        if not raw.get("size"):
+            raise ValueError("change_size requires size")
+        return op, (_positive_int(raw.get("cart_id"), "cart_id"), raw["size"])
+    if op == "remove":
+        return op, (_positive_int(raw.get("cart_id"), "cart_id"),)
+
+    raise ValueError(f"Unknown op: {op}")
+
+
+def apply_cart_operations(user_id, operations):
+    """
+    Apply operations in order inside one transaction. Consecutive
+    operations of the same kind collapse into one statement (one upsert
+    for a run of adds, one CASE UPDATE for quantities, one DELETE for
+    removals); size changes merge rows and run one by one.
+
+    Cart ids that are not the user's are ignored, so replaying a stale
+    guest cart is harmless. Unknown products raise ValueError and roll
+    the whole batch back.
+    """
+    parsed = [parse_operation(raw) for raw in operations]
+
+    with transaction.atomic():
+        for op, run in groupby(parsed, key=lambda item: item[0]):
+            payloads = [payload for _, payload in run]
+
+            if op == "add":
+                lines = defaultdict(int)
+                for product_id, size, quantity in payloads:
+                    lines[(product_id, size)] += quantity
+                if len(add_lines(user_id, dict(lines))) != len(lines):
+                    raise ValueError("Invalid product")
+
+            elif op == "set_quantity":
+                set_quantities(user_id, dict(payloads))
+
+            elif op == "remove":
+                remove_lines(user_id, [cart_id for (cart_id,) in payloads])
+
+            else:
+                for cart_id, size in payloads:
+                    change_cart_size(user_id, cart_id, size)
@@ -0,0 +1,87 @@
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Order
+from .status_events import publish_order_status
+from .stock import release_orders_stock
+
+
+BULK_STATUS_LIMIT = 1000
+
+
+# =============================================================
+# ADMIN LIST FILTERS
+# =============================================================
+def _day_start(value):
+    """
+    "YYYY-MM-DD" -> aware midnight in the current timezone.
+    Raises ValueError on bad input.
+    """
+    day = datetime.strptime(value, "%Y-%m-%d").date()
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_orders(queryset, params):
+    """
+    ?status=SHIPPED&from=2026-01-01&to=2026-01-31&pincode=400001
+    Dates are inclusive and compared as a created_at range so the
+    (status, created_at) index applies. Raises ValueError on bad input.
+    """
+    status_value = params.get("status")
+    if status_value:
+        if status_value not in Order.TRANSITIONS:
+            raise ValueError("Invalid status")
+        queryset = queryset.filter(status=status_value)
+
+    if params.get("from"):
+        queryset = queryset.filter(created_at__gte=_day_start(params["from"]))
+    if params.get("to"):
+        queryset = queryset.filter(
+            created_at__lt=_day_start(params["to"]) + timedelta(days=1)
+        )
+
+    if params.get("pincode"):
+        queryset = queryset.filter(address__pincode=params["pincode"])
+
+    return queryset
+
+
+# =============================================================
+# BULK STATUS TRANSITIONS
+# =============================================================
+def allowed_sources(target):
+    return [
+        source for source, targets in Order.TRANSITIONS.items()
+        if target in targets
+    ]
+
+
+def bulk_transition(order_ids, target):
+    """
+    Move every order in `order_ids` whose current status allows it to
+    `target` with one UPDATE. Rows are locked first so the returned ids
+    are exactly the ones changed. Cancelling also returns stock.
+
+    Returns (updated_ids, skipped_ids).
+    """
+    sources = allowed_sources(target)
+
+    with transaction.atomic():
+        eligible = list(
+            Order.objects.select_for_update()
+            .filter(pk__in=order_ids, status__in=sources)
+            .values_list("id", flat=True)
+        )
+        Order.objects.filter(pk__in=eligible).update(status=target)
+
+        if target == "CANCELLED":
+            release_orders_stock(eligible)
+
+        for order_id in eligible:
+            publish_order_status(order_id, target)
+
+    updated = set(eligible)
+    skipped = [order_id for order_id in order_ids if order_id not in updated]
+    return sorted(updated), skipped
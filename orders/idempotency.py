@@ -0,0 +1,172 @@
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+POLL_INTERVAL = 0.1
+
+
+def request_fingerprint(request):
+    """
+    Same key + different request body/endpoint is a client bug, not a retry
+    """
+    data = request.data.dict() if hasattr(request.data, "dict") else request.data
+    raw = json.dumps(
+        [request.method, request.path, data],
+        sort_keys=True,
+        default=str,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def expiry_cutoff():
+    return timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+def claim_key(user, key, fingerprint):
+    """
+    Insert the key as IN_PROGRESS (committed immediately, so duplicates
+    on other workers see it). Returns (record, created); record is None
+    if the key vanished between the insert and the read.
+    """
+    # An expired key is free to reuse
+    IdempotencyKey.objects.filter(
+        user=user, key=key, created_at__lt=expiry_cutoff()
+    ).delete()
+
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user, key=key, fingerprint=fingerprint
+            ), True
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(user=user, key=key).first(), False
+
+
+class DiscardResult(Exception):
+    """
+    Raised inside the work transaction to roll it back on a 5xx
+    """
+
+    def __init__(self, response):
+        self.response = response
+
+
+def run_claimed(record, created, run_view):
+    """
+    Run the view for an IN_PROGRESS key while holding the key row's lock,
+    and store the response in the same transaction as the view's writes.
+
+    The lock is what marks a request as alive: a worker that crashes
+    mid-request rolls back and releases it, so a waiting duplicate can
+    lock the row and run the request itself. Duplicates pass
+    `created=False` and never block on the lock.
+
+    Returns None when another request holds the key (or it vanished).
+    """
+    try:
+        with transaction.atomic():
+            locked = (
+                IdempotencyKey.objects.select_for_update(skip_locked=not created)
+                .filter(pk=record.pk).first()
+            )
+            if locked is None:
+                return None
+            # A duplicate took over (and finished) before this request got the lock
+            if locked.status == "DONE":
+                return replay(locked)
+
+            response = run_view()
+            if response.status_code >= 500:
+                raise DiscardResult(response)
+
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                status="DONE",
+                response_status=response.status_code,
+                response_body=response.data
+            )
+            return response
+    except DiscardResult as exc:
+        record.delete()
+        return exc.response
+    except Exception:
+        record.delete()
+        raise
+
+
+def replay(record):
+    response = Response(record.response_body, status=record.response_status)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+# =============================================================
+# VIEW DECORATOR
+# =============================================================
+def idempotent(view_method):
+    """
+    Honour an optional Idempotency-Key header on an APIView method.
+
+    First request: runs the view and stores its response in the same
+    transaction (5xx responses and exceptions roll back and free the key
+    so the client can retry).
+    Retry with the same key and body: replays the stored response.
+    Retry while the first is still running: waits for it, then replays;
+    if the first one failed or its worker died, the retry runs instead.
+    Same key with a different body: 422.
+
+    The view runs inside a transaction opened here; nested
+    @transaction.atomic blocks become savepoints.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+
+        if len(key) > 255:
+            return Response({"error": "Idempotency-Key too long"}, status=400)
+
+        fingerprint = request_fingerprint(request)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+        while True:
+            record, created = claim_key(request.user, key, fingerprint)
+
+            if record is not None:
+                if record.fingerprint != fingerprint:
+                    return Response(
+                        {"error": "Idempotency-Key was used for a different request"},
+                        status=422
+                    )
+
+                if record.status == "DONE":
+                    return replay(record)
+
+                response = run_claimed(
+                    record, created,
+                    lambda: view_method(self, request, *args, **kwargs)
+                )
+                if response is not None:
+                    return response
+
+            if time.monotonic() >= deadline:
+                return Response(
+                    {"error": "A request with this Idempotency-Key is in progress"},
+                    status=409
+                )
+            time.sleep(POLL_INTERVAL)
+
+    return wrapper
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from orders.idempotency import expiry_cutoff
+from orders.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete Idempotency-Key records older than IDEMPOTENCY_KEY_TTL_HOURS"
+
+    def handle(self, *args, **options):
+        count, _ = IdempotencyKey.objects.filter(created_at__lt=expiry_cutoff()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} idempotency keys"))
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders.stock import release_unpaid_orders
+
+
+class Command(BaseCommand):
+    help = "Cancel unpaid online orders past the reservation TTL and restock them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes", type=int, default=settings.STOCK_RESERVATION_TTL_MINUTES
+        )
+
+    def handle(self, *args, **options):
+        count = release_unpaid_orders(minutes=options["minutes"])
+        self.stdout.write(self.style.SUCCESS(f"Released stock for {count} orders"))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_stock_reserved'),
+        ('products', '0012_hot_query_indexes'),
+        ('users', '0005_otp_lookup_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['user', '-id'], name='cart_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-id'], name='order_user_id_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:05
+
+from django.db import migrations, models
+from django.db.models import Prefetch
+
+
+BATCH_SIZE = 500
+
+
+def backfill_order_summary(apps, schema_editor):
+    """
+    Walk the orders by id in batches so memory stays flat on large tables
+    """
+    Order = apps.get_model("orders", "Order")
+    OrderItem = apps.get_model("orders", "OrderItem")
+
+    items = OrderItem.objects.select_related("product").only(
+        "order_id", "product__name", "product__main_image"
+    ).order_by("id")
+    orders = (
+        Order.objects.only("id")
+        .order_by("id")
+        .prefetch_related(Prefetch("items", queryset=items))
+    )
+
+    last_id = 0
+    while True:
+        batch = list(orders.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            break
+
+        for order in batch:
+            products = [item.product for item in order.items.all()]
+            names = ", ".join(product.name for product in products)
+            order.item_count = len(products)
+            order.preview_image = products[0].main_image if products else ""
+            order.items_preview = names if len(names) <= 255 else names[:254] + "…"
+
+        Order.objects.bulk_update(batch, ["item_count", "preview_image", "items_preview"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='items_preview',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='preview_image',
+            field=models.URLField(blank=True),
+        ),
+        migrations.RunPython(backfill_order_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_summary'),
+        ('users', '0005_otp_lookup_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='order_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='payment_expired',
+            field=models.BooleanField(default=False),
+        ),
+    ]
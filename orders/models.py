@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from users.models import User, Address
 from products.models import Product
@@ -17,6 +18,9 @@ class Cart(models.Model):
         db_table = "cart"
         unique_together = ("user", "product", "size")
         ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["user", "-id"], name="cart_user_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.id} - {self.product.name} ({self.size})"
@@ -35,6 +39,16 @@ class Order(models.Model):
         ("CANCELLED", "Cancelled"),
     ]
 
+    # status -> statuses it may move to (enforced by bulk admin updates)
+    TRANSITIONS = {
+        "PENDING": {"CONFIRMED", "CANCELLED"},
+        "CONFIRMED": {"SHIPPED", "CANCELLED"},
+        "SHIPPED": {"OUT_FOR_DELIVERY", "DELIVERED"},
+        "OUT_FOR_DELIVERY": {"DELIVERED"},
+        "DELIVERED": set(),
+        "CANCELLED": set(),
+    }
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=True)
     address = models.ForeignKey(Address, on_delete=models.SET_NULL, null=True)
     total_amount = models.FloatField()
@@ -43,15 +57,44 @@ class Order(models.Model):
         choices=STATUS_CHOICES,
         default="PENDING"
     )
+    # True while the order holds product stock (see orders/stock.py)
+    stock_reserved = models.BooleanField(default=False)
+    # Cancelled by release_unpaid_orders; a late payment may still revive it
+    payment_expired = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Written once at creation so order lists never touch order_items
+    item_count = models.PositiveIntegerField(default=0)
+    preview_image = models.URLField(blank=True)
+    items_preview = models.CharField(max_length=255, blank=True)
+
     class Meta:
         db_table = "orders"
         ordering = ["-id"]
+        indexes = [
+            models.Index(fields=["user", "-id"], name="order_user_id_idx"),
+            # admin console: filter by status, newest first
+            models.Index(fields=["status", "-created_at", "-id"], name="order_status_created_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} ({self.status})"
 
+    @staticmethod
+    def summary_fields(products):
+        """
+        Summary columns for an order whose items are `products` (in order)
+        """
+        names = ", ".join(product.name for product in products)
+        if len(names) > 255:
+            names = names[:254] + "…"
+
+        return {
+            "item_count": len(products),
+            "preview_image": products[0].main_image if products else "",
+            "items_preview": names,
+        }
+
 
 # ==================================================
 # 🧾 ORDER ITEMS
@@ -73,3 +116,35 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f"{self.order.id} - {self.product.name}"
+
+
+# ==================================================
+# 🔁 IDEMPOTENCY KEYS
+# ==================================================
+class IdempotencyKey(models.Model):
+    """
+    One row per (user, Idempotency-Key) on order / payment creation;
+    holds the first response so retries replay it (see orders/idempotency.py)
+    """
+    STATUS_CHOICES = [
+        ("IN_PROGRESS", "In progress"),
+        ("DONE", "Done"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="IN_PROGRESS")
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "idempotency_keys"
+        unique_together = ("user", "key")
+        indexes = [
+            models.Index(fields=["created_at"], name="idempotency_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.status})"
@@ -1,11 +1,30 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Cart, Order, OrderItem
-from products.serializers import ProductSerializer
+from products.serializers import ProductListSerializer
 from users.serializers import AddressSerializer
 
+# Product card fields shown on a cart row (no category / rating / hover image)
+CART_PRODUCT_FIELDS = [
+    "id",
+    "name",
+    "slug",
+    "price",
+    "mrp",
+    "discount",
+    "discounted_price",
+    "main_image",
+    "srcset",
+]
+
+
 # ============================ CART SERIALIZER ============================ #
 class CartSerializer(serializers.ModelSerializer):
-    product_details = ProductSerializer(source='product', read_only=True)
+    product_details = ProductListSerializer(
+        source='product',
+        read_only=True,
+        fields=CART_PRODUCT_FIELDS
+    )
 
     class Meta:
         model = Cart
@@ -18,11 +37,33 @@ class CartSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id"]
 
+    @classmethod
+    def optimize(cls, queryset):
+        """
+        One joined query loading only the cart + product card columns
+        """
+        columns = ProductListSerializer.model_columns(CART_PRODUCT_FIELDS)
+        return queryset.select_related("product").only(
+            "id", "product", "size", "quantity",
+            *[f"product__{column}" for column in columns]
+        )
+
 
 
 # ======================== ORDER ITEMS SERIALIZER ======================== #
+class OrderItemListSerializer(serializers.ListSerializer):
+
+    def get_attribute(self, instance):
+        # Checkout passes the rows it just created, so they are not re-read
+        items = self.context.get("items")
+        if items is not None:
+            return items
+        return super().get_attribute(instance)
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    # Compact card: no description / gallery, so no images query per item
+    product = ProductListSerializer(read_only=True)
 
     class Meta:
         model = OrderItem
@@ -32,11 +73,17 @@ class OrderItemSerializer(serializers.ModelSerializer):
             "quantity",
             "price"
         ]
+        list_serializer_class = OrderItemListSerializer
 
 
 
 # ============================ ORDER SERIALIZER =========================== #
 class OrderSerializer(serializers.ModelSerializer):
+    """
+    Pair with `OrderSerializer.optimize(queryset)` so address, items and
+    their products arrive in a constant number of queries, or pass
+    `context={"items": [...]}` when the items are already in memory.
+    """
     items = OrderItemSerializer(many=True, read_only=True)
     total_items = serializers.SerializerMethodField()   # 🔥 new dynamic field
     address = AddressSerializer(read_only=True)   # NEW
@@ -46,5 +93,50 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = ["id", "total_amount", "total_items", "status", "created_at", "address", "items"]
 
+    @classmethod
+    def optimize(cls, queryset):
+        return (
+            queryset.select_related("address")
+            .prefetch_related(
+                Prefetch(
+                    "items",
+                    queryset=OrderItem.objects.select_related("product__category")
+                )
+            )
+        )
+
     def get_total_items(self, obj):
-        return obj.items.count()  # count number of products in order
+        return obj.item_count  # number of products, stored at creation
+
+
+# ======================== ORDER SUMMARY SERIALIZER ======================= #
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """
+    Order list card: only columns of the orders table, no joins
+    """
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "total_amount",
+            "status",
+            "created_at",
+            "item_count",
+            "preview_image",
+            "items_preview",
+        ]
+
+
+# ========================= ADMIN ORDER SERIALIZER ======================== #
+class AdminOrderSerializer(OrderSummarySerializer):
+    pincode = serializers.CharField(source="address.pincode", read_only=True, default=None)
+
+    class Meta(OrderSummarySerializer.Meta):
+        fields = OrderSummarySerializer.Meta.fields + ["user", "pincode"]
+
+    @classmethod
+    def optimize(cls, queryset):
+        return queryset.select_related("address").only(
+            *OrderSummarySerializer.Meta.fields, "user", "address__pincode"
+        )
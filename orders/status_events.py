@@ -0,0 +1,171 @@
+import asyncio
+import threading
+import uuid
+from collections import defaultdict
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+STATUS_EVENT_TIMEOUT = 60 * 60
+
+
+def _event_key(order_id):
+    return f"orders:status-event:{order_id}"
+
+
+# =============================================================
+# PER-PROCESS FAN-OUT
+# =============================================================
+class StatusHub:
+    """
+    Order id -> one asyncio.Queue per open status stream in this worker.
+    `deliver` is thread-safe: sync views (webhook, admin) run in worker
+    threads and hand events to the event loop with call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.last_seq = {}
+        self.lock = threading.Lock()
+        self.loop = None
+        self.poller = None
+
+    def subscribe(self, order_id, seen_seq=None):
+        """
+        `seen_seq`: the shared event the caller's snapshot already covers,
+        so the poller does not replay it (only used by the first stream
+        of an order; later ones share the order's dedup state).
+        """
+        queue = asyncio.Queue()
+        with self.lock:
+            self.loop = asyncio.get_running_loop()
+            if order_id not in self.subscribers and seen_seq:
+                self.last_seq[order_id] = seen_seq
+            self.subscribers[order_id].add(queue)
+        return queue
+
+    def unsubscribe(self, order_id, queue):
+        with self.lock:
+            queues = self.subscribers.get(order_id)
+            if queues is None:
+                return
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[order_id]
+                self.last_seq.pop(order_id, None)
+
+    def order_ids(self):
+        with self.lock:
+            return list(self.subscribers)
+
+    def deliver(self, order_id, event):
+        """
+        Push to every stream watching the order; an event already
+        delivered (same seq, e.g. seen locally and then via the poller)
+        is skipped.
+        """
+        with self.lock:
+            queues = list(self.subscribers.get(order_id, ()))
+            if not queues or self.last_seq.get(order_id) == event["seq"]:
+                return
+            self.last_seq[order_id] = event["seq"]
+            loop = self.loop
+
+        for queue in queues:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Event loop already closed (worker shutting down)
+                pass
+
+
+status_hub = StatusHub()
+
+
+# =============================================================
+# BACKENDS (settings.ORDER_EVENTS_BACKEND)
+# =============================================================
+class LocalStatusBackend:
+    """
+    In-process only: the publishing request and the stream must be served
+    by the same worker. Fine for a single ASGI process.
+    """
+
+    def publish(self, order_id, event):
+        status_hub.deliver(order_id, event)
+
+    async def latest_seq(self, order_id):
+        return None
+
+    def ensure_polling(self, hub):
+        pass
+
+
+class CacheStatusBackend(LocalStatusBackend):
+    """
+    Keeps the latest event per order in the shared cache. Each worker
+    runs ONE poller while it has open streams, reading every watched order
+    with a single get_many per interval, so the status check load no
+    longer grows with the number of waiting clients and hits no database.
+    """
+
+    def publish(self, order_id, event):
+        cache.set(_event_key(order_id), event, STATUS_EVENT_TIMEOUT)
+        super().publish(order_id, event)
+
+    async def latest_seq(self, order_id):
+        """
+        Read BEFORE the stream's database snapshot: an event published in
+        between then has a newer seq and still reaches the client.
+        """
+        event = await sync_to_async(cache.get, thread_sensitive=False)(_event_key(order_id))
+        return event["seq"] if event else None
+
+    def ensure_polling(self, hub):
+        if hub.poller is None or hub.poller.done():
+            hub.poller = asyncio.get_running_loop().create_task(self.poll(hub))
+
+    async def poll(self, hub):
+        get_many = sync_to_async(cache.get_many, thread_sensitive=False)
+
+        while True:
+            await asyncio.sleep(settings.ORDER_EVENTS_POLL_SECONDS)
+
+            order_ids = hub.order_ids()
+            if not order_ids:
+                return
+
+            keys = {_event_key(order_id): order_id for order_id in order_ids}
+            for key, event in (await get_many(list(keys))).items():
+                hub.deliver(keys[key], event)
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.ORDER_EVENTS_BACKEND)()
+
+
+# =============================================================
+# PUBLIC HELPERS
+# =============================================================
+def status_event(order_id, status, payment_status=None):
+    return {
+        "order_id": order_id,
+        "status": status,
+        "payment_status": payment_status,
+        "seq": uuid.uuid4().hex,
+    }
+
+
+def publish_order_status(order_id, status, payment_status=None):
+    """
+    Notify status streams once the current transaction commits
+    (immediately outside one), so clients never see rolled-back states.
+    """
+    event = status_event(order_id, status, payment_status)
+    transaction.on_commit(lambda: get_backend().publish(order_id, event))
@@ -0,0 +1,216 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from products.cache import invalidate_product_detail
+from products.models import Product
+from products.popularity import record_sales
+
+from .status_events import publish_order_status
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_ids):
+        self.product_ids = list(product_ids)
+        super().__init__("Insufficient stock")
+
+
+def merge_lines(lines):
+    """
+    [(product_id, quantity), ...] -> {product_id: total_quantity}
+    The same product can appear once per size in a cart.
+    """
+    totals = defaultdict(int)
+    for product_id, quantity in lines:
+        totals[product_id] += quantity
+    return dict(totals)
+
+
+def quantity_case(totals):
+    return Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in totals.items()],
+        default=Value(0),
+        output_field=IntegerField()
+    )
+
+
+def drop_cached_stock(product_ids):
+    """
+    QuerySet.update() sends no post_save, so the cached product detail
+    (which shows quantity) is rotated here once the change commits.
+    """
+    slugs = list(
+        Product.objects.filter(pk__in=product_ids).values_list("slug", flat=True)
+    )
+    transaction.on_commit(
+        lambda: [invalidate_product_detail(slug) for slug in slugs]
+    )
+
+
+# =============================================================
+# RESERVE
+# =============================================================
+def reserve_stock(lines):
+    """
+    Decrement stock for every line in ONE conditional UPDATE:
+
+        UPDATE product SET quantity = quantity - CASE id WHEN .. END
+        WHERE id IN (..) AND quantity >= CASE id WHEN .. END
+
+    No rows are read first, and the row locks taken by the UPDATE are
+    held only until the surrounding checkout transaction commits.
+    If any product is short the statement's savepoint is rolled back and
+    OutOfStock is raised with the ids that could not be covered.
+    """
+    totals = merge_lines(lines)
+    if not totals:
+        return
+
+    needed = quantity_case(totals)
+
+    try:
+        with transaction.atomic():
+            updated = Product.objects.filter(
+                pk__in=totals, quantity__gte=needed
+            ).update(quantity=F("quantity") - needed)
+
+            if updated != len(totals):
+                raise OutOfStock(())
+    except OutOfStock:
+        short = set(totals) - set(
+            Product.objects.filter(pk__in=totals, quantity__gte=needed)
+            .values_list("id", flat=True)
+        )
+        raise OutOfStock(sorted(short))
+
+    drop_cached_stock(totals)
+
+
+# =============================================================
+# RELEASE
+# =============================================================
+def release_orders_stock(order_ids):
+    """
+    Give the reserved stock of many orders back with set-based statements.
+    Safe to call more than once: the `stock_reserved` flags are claimed
+    under row locks and cleared with one UPDATE, so only one caller ever
+    restores the quantities. Returns the ids that were released.
+    """
+    from .models import Order, OrderItem
+
+    with transaction.atomic():
+        claimed = dict(
+            Order.objects.select_for_update()
+            .filter(pk__in=order_ids, stock_reserved=True)
+            .values_list("id", "created_at")
+        )
+        if not claimed:
+            return []
+
+        Order.objects.filter(pk__in=claimed).update(stock_reserved=False)
+
+        rows = list(
+            OrderItem.objects.filter(order_id__in=claimed)
+            .values_list("order_id", "product_id", "quantity")
+        )
+        totals = merge_lines((product_id, quantity) for _, product_id, quantity in rows)
+        if totals:
+            Product.objects.filter(pk__in=totals).update(
+                quantity=F("quantity") + quantity_case(totals)
+            )
+            drop_cached_stock(totals)
+
+        # A cancelled sale no longer counts towards best-sellers
+        by_day = defaultdict(list)
+        for order_id, product_id, quantity in rows:
+            by_day[timezone.localdate(claimed[order_id])].append((product_id, quantity))
+        for day, lines in by_day.items():
+            record_sales(lines, day=day, sign=-1)
+
+    return list(claimed)
+
+
+def release_stock(order):
+    released = bool(release_orders_stock([order.pk]))
+    order.stock_reserved = False
+    return released
+
+
+# =============================================================
+# CONFIRM AFTER PAYMENT
+# =============================================================
+def confirm_paid_order(order_id):
+    """
+    Confirm a paid order under its row lock, so the callback and the
+    webhook arriving together cannot both act on it.
+
+    - Still holds its stock: PENDING -> CONFIRMED.
+    - Cancelled by release_unpaid_orders (payment_expired): the items are
+      reserved again and the order is revived.
+    - Cancelled by an admin, or the items are sold out: returns False, the
+      order stays cancelled and the payment has to be refunded.
+    """
+    from .models import Order, OrderItem
+
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(pk=order_id)
+
+        if order.status != "CANCELLED":
+            if order.status == "PENDING":
+                Order.objects.filter(pk=order_id).update(status="CONFIRMED")
+            return True
+
+        if order.stock_reserved or not order.payment_expired:
+            return False
+
+        lines = list(
+            OrderItem.objects.filter(order_id=order_id)
+            .values_list("product_id", "quantity")
+        )
+        try:
+            reserve_stock(lines)
+        except OutOfStock:
+            return False
+
+        Order.objects.filter(pk=order_id).update(
+            status="CONFIRMED", stock_reserved=True, payment_expired=False
+        )
+        # release_orders_stock took the sale back out of the rankings
+        record_sales(lines, day=timezone.localdate(order.created_at))
+        return True
+
+
+def release_unpaid_orders(minutes=None):
+    """
+    Cancel online-payment orders still unpaid after the reservation TTL
+    and return their stock. Cash orders (no payment row) are left alone.
+    """
+    from .models import Order
+
+    minutes = minutes or settings.STOCK_RESERVATION_TTL_MINUTES
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+
+    expired = Order.objects.filter(
+        status="PENDING",
+        stock_reserved=True,
+        created_at__lt=cutoff,
+        payment__isnull=False,
+    ).exclude(payment__status="PAID")
+
+    with transaction.atomic():
+        payment_status = dict(
+            expired.select_for_update(of=("self",)).values_list("id", "payment__status")
+        )
+        Order.objects.filter(pk__in=payment_status).update(
+            status="CANCELLED", payment_expired=True
+        )
+
+        # Open status streams see the auto-cancel
+        for order_id, status in payment_status.items():
+            publish_order_status(order_id, "CANCELLED", status)
+
+        return len(release_orders_stock(list(payment_status)))
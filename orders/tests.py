@@ -1,3 +1,883 @@
-from django.test import TestCase
+import asyncio
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from payments.models import Payment
+from products.models import Category, Product, ProductSalesDaily
+from products.pagination import KeysetPagination
+from products.tests import SEED_ROWS, IndexScanMixin, make_product, postgres_only
+from users.models import Address, User
+
+from .cart_ops import CART_BATCH_LIMIT
+from .fulfilment import BULK_STATUS_LIMIT
+from .models import Cart, IdempotencyKey, Order, OrderItem
+from .status_events import CacheStatusBackend, StatusHub, _event_key, status_event
+from .stock import (
+    OutOfStock, confirm_paid_order, release_orders_stock, release_unpaid_orders,
+    reserve_stock
+)
+from .views import ORDER_PAGE_SIZE
+
+
+def make_address(user):
+    return Address.objects.create(
+        user=user, name="Test", mobile=user.mobile, pincode="400001",
+        state="MH", city="Mumbai", street="Street", landmark="Landmark", area="Area"
+    )
+
+
+def make_order(user, lines, **kwargs):
+    """
+    lines: [(product, quantity), ...]; stock is reserved like checkout does
+    """
+    reserve_stock([(product.id, quantity) for product, quantity in lines])
+    order = Order.objects.create(
+        user=user, address=make_address(user), total_amount=0, stock_reserved=True, **kwargs
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(order=order, product=product, size="M", quantity=quantity, price=product.price)
+        for product, quantity in lines
+    )
+    return order
+
+
+def stock(*products):
+    return [Product.objects.get(pk=product.pk).quantity for product in products]
+
+
+# =============================================================
+# STOCK RESERVATION
+# =============================================================
+class StockReservationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("9000000001")
+        cls.saree = make_product("Saree", quantity=5)
+        cls.kurta = make_product("Kurta", quantity=1)
+
+    def test_reserve_decrements_every_line(self):
+        # Same product twice (two sizes) is checked against the combined quantity
+        reserve_stock([(self.saree.id, 2), (self.saree.id, 1), (self.kurta.id, 1)])
+        self.assertEqual(stock(self.saree, self.kurta), [2, 0])
+
+    def test_short_line_reserves_nothing(self):
+        with self.assertRaises(OutOfStock) as raised:
+            reserve_stock([(self.saree.id, 2), (self.kurta.id, 2)])
+        self.assertEqual(raised.exception.product_ids, [self.kurta.id])
+        self.assertEqual(stock(self.saree, self.kurta), [5, 1])
+
+    def test_release_is_idempotent(self):
+        order = make_order(self.user, [(self.saree, 3)])
+        self.assertEqual(release_orders_stock([order.id]), [order.id])
+        self.assertEqual(release_orders_stock([order.id]), [])
+        self.assertEqual(stock(self.saree), [5])
+
+    def test_unpaid_sweep(self):
+        expired = make_order(self.user, [(self.saree, 2)])
+        paid = make_order(self.user, [(self.saree, 1)])
+        cash = make_order(self.user, [(self.kurta, 1)])
+        fresh = make_order(self.user, [(self.saree, 1)])
+
+        Payment.objects.create(order=expired, razorpay_order_id="rz_expired")
+        Payment.objects.create(order=paid, razorpay_order_id="rz_paid", status="PAID")
+        Payment.objects.create(order=fresh, razorpay_order_id="rz_fresh")
+        Order.objects.filter(pk__in=[expired.pk, paid.pk, cash.pk]).update(
+            created_at=timezone.now() - timedelta(hours=2)
+        )
+
+        self.assertEqual(release_unpaid_orders(minutes=30), 1)
+        self.assertEqual(
+            dict(Order.objects.values_list("id", "status")),
+            {expired.id: "CANCELLED", paid.id: "PENDING", cash.id: "PENDING", fresh.id: "PENDING"}
+        )
+        self.assertEqual(stock(self.saree, self.kurta), [5 - 1 - 1, 0])
+
+    def test_unpaid_sweep_notifies_status_streams(self):
+        expired = make_order(self.user, [(self.saree, 1)])
+        Payment.objects.create(order=expired, razorpay_order_id="rz_expired", status="FAILED")
+        Order.objects.filter(pk=expired.pk).update(created_at=timezone.now() - timedelta(hours=2))
+
+        with mock.patch("orders.status_events.get_backend") as get_backend:
+            with self.captureOnCommitCallbacks(execute=True):
+                release_unpaid_orders(minutes=30)
+
+        (order_id, event), _ = get_backend.return_value.publish.call_args
+        self.assertEqual(order_id, expired.id)
+        self.assertEqual((event["status"], event["payment_status"]), ("CANCELLED", "FAILED"))
+
+    def test_checkout_out_of_stock_keeps_cart(self):
+        Cart.objects.create(user=self.user, product=self.kurta, size="M", quantity=2)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.post(
+            "/api/orders/checkout/", {"address_id": make_address(self.user).id}, format="json"
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["product_ids"], [self.kurta.id])
+        self.assertEqual(Cart.objects.count(), 1)
+        self.assertFalse(Order.objects.exists())
+
+    # ---------------------------------------------------------
+    # PAYMENT CAPTURED
+    # ---------------------------------------------------------
+    def test_confirm_keeps_reservation(self):
+        order = make_order(self.user, [(self.saree, 2)])
+        self.assertTrue(confirm_paid_order(order.id))
+        self.assertEqual(Order.objects.get(pk=order.pk).status, "CONFIRMED")
+        self.assertEqual(stock(self.saree), [3])
+
+    def expire(self, order):
+        # What release_unpaid_orders does to an order past the TTL
+        Order.objects.filter(pk=order.pk).update(status="CANCELLED", payment_expired=True)
+        release_orders_stock([order.id])
+
+    def test_late_payment_reserves_again(self):
+        order = make_order(self.user, [(self.saree, 2)])
+        self.expire(order)
+
+        self.assertTrue(confirm_paid_order(order.id))
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.stock_reserved), ("CONFIRMED", True))
+        self.assertEqual(stock(self.saree), [3])
+
+    def test_late_payment_is_applied_once(self):
+        # Callback and webhook both report the capture
+        order = make_order(self.user, [(self.saree, 2)])
+        self.expire(order)
+
+        self.assertTrue(confirm_paid_order(order.id))
+        self.assertTrue(confirm_paid_order(order.id))
+        self.assertEqual(stock(self.saree), [3])
+        # make_order records no sale: -2 on release, +2 once on revival
+        self.assertEqual(ProductSalesDaily.objects.get(product=self.saree).quantity, 0)
+
+    def test_payment_for_admin_cancelled_order_is_refunded(self):
+        order = make_order(self.user, [(self.saree, 2)])
+        Order.objects.filter(pk=order.pk).update(status="CANCELLED")
+        release_orders_stock([order.id])
+
+        self.assertFalse(confirm_paid_order(order.id))
+        self.assertEqual(Order.objects.get(pk=order.pk).status, "CANCELLED")
+        self.assertEqual(stock(self.saree), [5])
+
+    def test_confirm_does_not_move_a_shipped_order_back(self):
+        order = make_order(self.user, [(self.saree, 1)], status="SHIPPED")
+        self.assertTrue(confirm_paid_order(order.id))
+        self.assertEqual(Order.objects.get(pk=order.pk).status, "SHIPPED")
+
+    def test_late_payment_for_sold_out_items_stays_cancelled(self):
+        order = make_order(self.user, [(self.kurta, 1)])
+        self.expire(order)
+        reserve_stock([(self.kurta.id, 1)])  # someone else bought it
+
+        self.assertFalse(confirm_paid_order(order.id))
+        self.assertEqual(Order.objects.get(pk=order.pk).status, "CANCELLED")
+        self.assertEqual(stock(self.kurta), [0])
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "needs concurrent writers")
+class StockContentionTests(TransactionTestCase):
+    """
+    Benchmark: hundreds of parallel checkouts on one SKU. Every buyer either
+    gets stock or OutOfStock, the SKU never goes below zero, and the run
+    has to finish quickly because no request waits on a long row lock.
+    """
+
+    BUYERS = 300
+    WORKERS = 32
+    STOCK = 100
+
+    def test_parallel_checkouts_never_oversell(self):
+        product = make_product("Flash sale saree", quantity=self.STOCK)
+
+        def buy(_):
+            try:
+                with transaction.atomic():
+                    reserve_stock([(product.id, 1)])
+                return True
+            except OutOfStock:
+                return False
+            finally:
+                connections.close_all()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(self.WORKERS) as pool:
+            results = list(pool.map(buy, range(self.BUYERS)))
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(results.count(True), self.STOCK)
+        self.assertEqual(stock(product), [0])
+        self.assertLess(elapsed, 10, f"{self.BUYERS / elapsed:.0f} checkouts/s")
+
+
+# =============================================================
+# CART WRITES
+# =============================================================
+class CartTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("9000000002")
+        cls.other = User.objects.create_user("9000000003")
+        cls.saree = make_product("Saree", quantity=10)
+        cls.kurta = make_product("Kurta", quantity=10)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def lines(self, user=None):
+        return set(
+            Cart.objects.filter(user=user or self.user)
+            .values_list("product_id", "size", "quantity")
+        )
+
+
+class CartUpsertTests(CartTestCase):
+
+    def add(self, product_id, size="M", quantity=1):
+        return self.client.post(
+            "/api/cart/add/",
+            {"product_id": product_id, "size": size, "quantity": quantity},
+            format="json"
+        )
+
+    def test_add_inserts_then_increments(self):
+        first = self.add(self.saree.id, quantity=2)
+        second = self.add(self.saree.id, quantity=3)
+
+        self.assertEqual(first.data["cart"]["id"], second.data["cart"]["id"])
+        self.assertEqual(second.data["cart"]["quantity"], 5)
+        self.assertEqual(self.lines(), {(self.saree.id, "M", 5)})
+
+    def test_add_is_one_statement(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.add(self.saree.id)
+        writes = [q for q in queries if q["sql"].lstrip().upper().startswith(("INSERT", "UPDATE"))]
+        self.assertEqual(len(writes), 1)
+
+    def test_add_unknown_product_is_404(self):
+        self.assertEqual(self.add(999999).status_code, 404)
+        self.assertFalse(Cart.objects.exists())
+
+    def change_size(self, cart_id, size):
+        return self.client.put(
+            "/api/cart/update/size/", {"cart_id": cart_id, "size": size}, format="json"
+        )
+
+    def test_size_change_moves_line(self):
+        line = Cart.objects.create(user=self.user, product=self.saree, size="M", quantity=2)
+        response = self.change_size(line.id, "L")
+        self.assertEqual((response.data["cart_id"], response.data["quantity"]), (line.id, 2))
+        self.assertEqual(self.lines(), {(self.saree.id, "L", 2)})
+
+    def test_size_change_merges_into_existing_line(self):
+        source = Cart.objects.create(user=self.user, product=self.saree, size="M", quantity=2)
+        target = Cart.objects.create(user=self.user, product=self.saree, size="L", quantity=3)
+
+        response = self.change_size(source.id, "L")
+        self.assertEqual((response.data["cart_id"], response.data["quantity"]), (target.id, 5))
+        self.assertEqual(self.lines(), {(self.saree.id, "L", 5)})
+
+    def test_size_change_to_same_size_is_a_no_op(self):
+        line = Cart.objects.create(user=self.user, product=self.saree, size="M", quantity=2)
+        response = self.change_size(line.id, "M")
+        self.assertEqual((response.data["cart_id"], response.data["quantity"]), (line.id, 2))
+
+    def test_size_change_of_another_users_line_is_404(self):
+        line = Cart.objects.create(user=self.other, product=self.saree, size="M", quantity=2)
+        self.assertEqual(self.change_size(line.id, "L").status_code, 404)
+        self.assertEqual(self.lines(self.other), {(self.saree.id, "M", 2)})
+
+
+class CartSummaryTests(CartTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def summary(self):
+        response = self.client.get("/api/cart/summary/")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_totals_in_one_query_then_from_cache(self):
+        Cart.objects.create(user=self.user, product=self.saree, size="M", quantity=2)
+        Cart.objects.create(user=self.user, product=self.kurta, size="L", quantity=1)
+
+        with self.assertNumQueries(1):
+            cold = self.summary()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.summary(), cold)
+
+        self.assertEqual(
+            cold, {"line_count": 2, "item_count": 3, "subtotal": 2700, "savings": 300}
+        )
+
+    def test_every_cart_change_refreshes_the_summary(self):
+        line = Cart.objects.create(user=self.user, product=self.saree, size="M", quantity=1)
+        address = make_address(self.user)
+
+        def kurta_line():
+            return Cart.objects.get(user=self.user, product=self.kurta).id
+
+        # (name, request, (line_count, item_count) afterwards)
+        changes = [
+            ("add", lambda: self.client.post(
+                "/api/cart/add/", {"product_id": self.kurta.id, "size": "M"}, format="json"
+            ), (2, 2)),
+            ("quantity", lambda: self.client.put(
+                "/api/cart/update/quantity/", {"cart_id": line.id, "quantity": 4}, format="json"
+            ), (2, 5)),
+            ("batch", lambda: self.client.post("/api/cart/batch/", {"operations": [
+                {"op": "add", "product_id": self.saree.id, "size": "S", "quantity": 2}
+            ]}, format="json"), (3, 7)),
+            ("size merge", lambda: self.client.put(
+                "/api/cart/update/size/", {"cart_id": line.id, "size": "S"}, format="json"
+            ), (2, 7)),
+            ("remove", lambda: self.client.delete(f"/api/cart/remove/{kurta_line()}/"), (1, 6)),
+            ("checkout", lambda: self.client.post(
+                "/api/orders/checkout/", {"address_id": address.id}, format="json"
+            ), (0, 0)),
+        ]
+        for name, change, expected in changes:
+            with self.subTest(change=name):
+                self.summary()                      # cached before the change
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.assertLess(change().status_code, 300)
+                summary = self.summary()
+                self.assertEqual((summary["line_count"], summary["item_count"]), expected)
+
+    def test_summaries_are_per_user(self):
+        Cart.objects.create(user=self.other, product=self.saree, size="M", quantity=3)
+        self.assertEqual(self.summary()["item_count"], 0)
+
+
+class CartBatchTests(CartTestCase):
+
+    def batch(self, operations):
+        return self.client.post("/api/cart/batch/", {"operations": operations}, format="json")
+
+    def test_operations_apply_in_order(self):
+        line = Cart.objects.create(user=self.user, product=self.kurta, size="S", quantity=1)
+        response = self.batch([
+            {"op": "add", "product_id": self.saree.id, "size": "M", "quantity": 1},
+            {"op": "add", "product_id": self.saree.id, "size": "M", "quantity": 2},
+            {"op": "add", "product_id": self.saree.id, "size": "L"},
+            {"op": "set_quantity", "cart_id": line.id, "quantity": 4},
+            {"op": "change_size", "cart_id": line.id, "size": "M"},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["cart"]), 3)
+        self.assertEqual(self.lines(), {
+            (self.saree.id, "M", 3), (self.saree.id, "L", 1), (self.kurta.id, "M", 4)
+        })
+
+    def test_runs_collapse_into_one_statement(self):
+        lines = [
+            Cart.objects.create(user=self.user, product=product, size=size)
+            for product in (self.saree, self.kurta) for size in ("S", "M")
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            self.batch([{"op": "set_quantity", "cart_id": line.id, "quantity": 3} for line in lines])
+        updates = [q for q in queries if q["sql"].lstrip().upper().startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+
+    def test_zero_quantity_and_remove_delete_lines(self):
+        keep, zero, gone = [
+            Cart.objects.create(user=self.user, product=self.saree, size=size)
+            for size in ("S", "M", "L")
+        ]
+        self.batch([
+            {"op": "set_quantity", "cart_id": zero.id, "quantity": 0},
+            {"op": "remove", "cart_id": gone.id},
+        ])
+        self.assertEqual(list(Cart.objects.values_list("id", flat=True)), [keep.id])
+
+    def test_other_users_lines_are_ignored(self):
+        line = Cart.objects.create(user=self.other, product=self.saree, size="M")
+        response = self.batch([{"op": "remove", "cart_id": line.id}])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Cart.objects.filter(pk=line.pk).exists())
+
+    def test_invalid_operation_rolls_back_the_batch(self):
+        response = self.batch([
+            {"op": "add", "product_id": self.saree.id, "size": "M"},
+            {"op": "add", "product_id": 999999, "size": "M"},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Cart.objects.exists())
+
+        response = self.batch([{"op": "explode"}])
+        self.assertEqual(response.data["error"], "Unknown op: explode")
+
+    def test_batch_limit(self):
+        response = self.batch([{"op": "remove", "cart_id": 1}] * (CART_BATCH_LIMIT + 1))
+        self.assertEqual(response.status_code, 400)
+
+
+# =============================================================
+# CHECKOUT
+# =============================================================
+class CheckoutTests(TestCase):
+    """
+    Benchmark across cart sizes 1-200: the query count is the cost
+    model of the checkout path and must not depend on the cart size.
+    """
+
+    CART_SIZES = (1, 2, 10, 50, 200)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [
+            make_product(f"Saree {i}", price=100 + i, quantity=1000)
+            for i in range(max(cls.CART_SIZES))
+        ]
+
+    def checkout(self, size):
+        user = User.objects.create_user(f"8{size:09d}")
+        address = make_address(user)
+        Cart.objects.bulk_create(
+            Cart(user=user, product=product, size="M", quantity=2)
+            for product in self.products[:size]
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post("/api/orders/checkout/", {"address_id": address.id}, format="json")
+        self.assertEqual(response.status_code, 201)
+        return response, queries
+
+    def test_query_count_is_independent_of_cart_size(self):
+        sizes = self.CART_SIZES
+        if connection.vendor == "sqlite":
+            # SQLite caps a statement at 999 parameters, so Django splits
+            # big multi-row INSERTs into batches; that is not per-row work
+            sizes = [size for size in sizes if size < 100]
+
+        counts = {size: len(self.checkout(size)[1]) for size in sizes}
+        self.assertEqual(len(set(counts.values())), 1, counts)
+
+    def test_order_matches_cart(self):
+        response, _ = self.checkout(50)
+        order = Order.objects.get(pk=response.data["order"]["id"])
+
+        self.assertEqual(order.total_amount, sum(2 * (100 + i) for i in range(50)))
+        self.assertEqual(order.item_count, 50)
+        self.assertEqual(order.items.count(), 50)
+        self.assertEqual(len(response.data["order"]["items"]), 50)
+        self.assertFalse(Cart.objects.filter(user=order.user).exists())
+        self.assertEqual(stock(self.products[0]), [998])
+
+    def test_response_is_not_re_read(self):
+        _, queries = self.checkout(10)
+        selects = [q["sql"] for q in queries if q["sql"].lstrip().upper().startswith("SELECT")]
+        self.assertFalse(any('FROM "order_items"' in sql for sql in selects), selects)
+
+    def test_empty_cart_is_400(self):
+        user = User.objects.create_user("9000000009")
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(
+            "/api/orders/checkout/", {"address_id": make_address(user).id}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+# =============================================================
+# ORDER LISTS
+# =============================================================
+class OrderCursorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("9000000011")
+        cls.admin = User.objects.create_user("9000000012", is_staff=True)
+        address = make_address(cls.user)
+        cls.orders = Order.objects.bulk_create(
+            Order(user=cls.user, address=address, total_amount=100) for _ in range(5)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_admin_list_walks_created_at_cursor(self):
+        self.client.force_authenticate(self.admin)
+        ids, url, params = [], "/api/orders/admin/list/", {"page_size": 2}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.data["results"]]
+            url, params = response.data["next"], None
+        self.assertEqual(ids, sorted((order.id for order in self.orders), reverse=True))
+
+    def test_malformed_cursor_values_are_400(self):
+        self.client.force_authenticate(self.admin)
+        paginator = KeysetPagination(("-created_at", "-id"))
+        for values in (["abc", 1], [{"a": 1}, 1], ["2026-01-01T00:00:00", "x"]):
+            with self.subTest(values=values):
+                response = self.client.get(
+                    "/api/orders/admin/list/", {"cursor": paginator.encode_cursor(values)}
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_user_list_rejects_a_cursor_from_another_list(self):
+        self.client.force_authenticate(self.user)
+        token = KeysetPagination(("-created_at", "-id")).encode_cursor(["2026-01-01", 1])
+        response = self.client.get("/api/orders/list/", {"cursor": token})
+        self.assertEqual(response.status_code, 400)
+
+
+class OrderListQueryTests(TestCase):
+    """
+    Benchmark: an order page costs a fixed number of queries, whatever
+    the number of orders on it or the number of items per order.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = [make_product(f"Saree {i}", quantity=1000) for i in range(5)]
+        cls.light = User.objects.create_user("9000000015")
+        cls.heavy = User.objects.create_user("9000000016")
+        make_order(cls.light, [(cls.products[0], 1)])
+        for _ in range(ORDER_PAGE_SIZE + 2):
+            make_order(
+                cls.heavy, [(product, 2) for product in cls.products],
+                **Order.summary_fields(cls.products)
+            )
+
+    def page(self, user, params=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get("/api/orders/list/", params)
+        self.assertEqual(response.status_code, 200)
+        return response, captured
+
+    def test_full_page_query_count_is_fixed(self):
+        _, light = self.page(self.light)
+        heavy_page, heavy = self.page(self.heavy)
+
+        self.assertEqual(len(light), len(heavy))
+        self.assertEqual(len(heavy_page.data["orders"]), ORDER_PAGE_SIZE)
+        self.assertEqual(len(heavy_page.data["orders"][0]["items"]), 5)
+
+    def test_summary_page_is_one_query_on_orders(self):
+        response, queries = self.page(self.heavy, {"mode": "summary"})
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("order_items", queries[0]["sql"])
+        card = response.data["orders"][0]
+        self.assertEqual(card["item_count"], 5)
+        self.assertTrue(card["items_preview"].startswith("Saree 0, Saree 1"))
+
+    def test_second_page_costs_the_same(self):
+        first, first_queries = self.page(self.heavy)
+        second, second_queries = self.page(self.heavy, {"cursor": first.data["cursor"]})
+
+        self.assertEqual(len(first_queries), len(second_queries))
+        self.assertEqual(len(second.data["orders"]), 2)
+        self.assertIsNone(second.data["cursor"])
+
+
+class AdminOrderConsoleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("9000000013")
+        cls.admin = User.objects.create_user("9000000014", is_staff=True)
+        cls.saree = make_product("Saree", quantity=10)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def bulk(self, order_ids, status):
+        return self.client.post(
+            "/api/orders/admin/status/bulk/", {"order_ids": order_ids, "status": status}, format="json"
+        )
+
+    def listed(self, params):
+        response = self.client.get("/api/orders/admin/list/", params)
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]]
+
+    # ---------------------------------------------------------
+    # BULK TRANSITIONS
+    # ---------------------------------------------------------
+    def test_only_allowed_transitions_are_applied(self):
+        pending = make_order(self.user, [(self.saree, 1)])
+        shipped = make_order(self.user, [(self.saree, 1)], status="SHIPPED")
+
+        with mock.patch("orders.fulfilment.publish_order_status") as publish:
+            response = self.bulk([pending.id, shipped.id, 999999], "CONFIRMED")
+
+        self.assertEqual(response.data["updated"], [pending.id])
+        self.assertEqual(response.data["skipped"], [shipped.id, 999999])
+        self.assertEqual(
+            dict(Order.objects.values_list("id", "status")),
+            {pending.id: "CONFIRMED", shipped.id: "SHIPPED"}
+        )
+        publish.assert_called_once_with(pending.id, "CONFIRMED")
+
+    def test_cancel_returns_stock_once(self):
+        orders = [make_order(self.user, [(self.saree, 2)]) for _ in range(3)]
+        ids = [order.id for order in orders]
+        self.assertEqual(stock(self.saree), [4])
+
+        self.assertEqual(self.bulk(ids, "CANCELLED").data["updated"], ids)
+        self.assertEqual(stock(self.saree), [10])
+
+        # Already cancelled: skipped, nothing returned twice
+        self.assertEqual(self.bulk(ids, "CANCELLED").data["skipped"], ids)
+        self.assertEqual(stock(self.saree), [10])
+
+    def test_bad_bulk_requests_are_400(self):
+        order = make_order(self.user, [(self.saree, 1)])
+        for order_ids, status in (
+            ([order.id], "LOST"),
+            (order.id, "CONFIRMED"),
+            (["abc"], "CONFIRMED"),
+            ([], "CONFIRMED"),
+            ([order.id] * (BULK_STATUS_LIMIT + 1), "CONFIRMED"),
+        ):
+            with self.subTest(order_ids=order_ids, status=status):
+                self.assertEqual(self.bulk(order_ids, status).status_code, 400)
+        self.assertEqual(Order.objects.get(pk=order.pk).status, "PENDING")
+
+    def test_console_is_admin_only(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get("/api/orders/admin/list/").status_code, 403)
+        self.assertEqual(self.bulk([1], "CONFIRMED").status_code, 403)
+
+    # ---------------------------------------------------------
+    # LIST FILTERS
+    # ---------------------------------------------------------
+    def test_filters_by_status_date_range_and_pincode(self):
+        mumbai = make_order(self.user, [(self.saree, 1)])
+        late_night = make_order(self.user, [(self.saree, 1)], status="SHIPPED")
+        other = make_order(self.user, [(self.saree, 1)], status="SHIPPED")
+        Address.objects.filter(order=other).update(pincode="110001")
+
+        for order, created_at in (
+            (mumbai, datetime(2026, 1, 14, 12)),
+            (late_night, datetime(2026, 1, 15, 23, 59)),
+            (other, datetime(2026, 1, 16, 0, 1)),
+        ):
+            Order.objects.filter(pk=order.pk).update(created_at=timezone.make_aware(created_at))
+
+        self.assertEqual(self.listed({"status": "SHIPPED"}), [other.id, late_night.id])
+        # Both ends inclusive, in the shop's timezone
+        self.assertEqual(self.listed({"from": "2026-01-15", "to": "2026-01-15"}), [late_night.id])
+        self.assertEqual(self.listed({"from": "2026-01-15"}), [other.id, late_night.id])
+        self.assertEqual(self.listed({"to": "2026-01-15"}), [late_night.id, mumbai.id])
+        self.assertEqual(self.listed({"pincode": "110001"}), [other.id])
+        self.assertEqual(self.listed({"status": "SHIPPED", "pincode": "400001"}), [late_night.id])
+
+    def test_malformed_filters_are_400(self):
+        for params in ({"from": "15-01-2026"}, {"to": "2026-02-30"}, {"status": "LOST"}):
+            with self.subTest(params=params):
+                response = self.client.get("/api/orders/admin/list/", params)
+                self.assertEqual(response.status_code, 400)
+
+
+# =============================================================
+# IDEMPOTENCY KEYS
+# =============================================================
+class IdempotencyKeyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("9000000004")
+        cls.address = make_address(cls.user)
+        cls.saree = make_product("Saree", quantity=10)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def buy(self, key=None, quantity=1, user=None):
+        if user is not None:
+            self.client.force_authenticate(user)
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post(
+            "/api/orders/buy-now/",
+            {"product_id": self.saree.id, "size": "M", "quantity": quantity,
+             "address_id": self.address.id},
+            format="json",
+            **headers
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self.buy("order-1")
+        retry = self.buy("order-1")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry.data), (201, first.data))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(stock(self.saree), [9])
+
+    def test_same_key_different_body_is_422(self):
+        self.buy("order-1")
+        response = self.buy("order-1", quantity=2)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_no_key_is_not_deduplicated(self):
+        self.buy()
+        self.buy()
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_keys_are_per_user(self):
+        other = User.objects.create_user("9000000005")
+        self.buy("order-1")
+        response = self.buy("order-1", user=other)
+        # The other user's address is not theirs: a fresh (404) run, not a replay
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+
+    def test_expired_key_runs_again(self):
+        self.buy("order-1")
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        response = self.buy("order-1")
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_failed_request_frees_the_key(self):
+        with mock.patch("orders.views.record_sales", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.buy("order-1")
+        # The order and the key roll back together
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(stock(self.saree), [10])
+
+        self.assertEqual(self.buy("order-1").status_code, 201)
+
+    def test_key_abandoned_by_a_dead_worker_is_taken_over(self):
+        # Claimed, then the worker died: its work rolled back, the key
+        # stayed IN_PROGRESS and nobody holds its row lock
+        self.buy("order-1")
+        Order.objects.all().delete()
+        IdempotencyKey.objects.update(status="IN_PROGRESS", response_status=None, response_body=None)
+
+        started = time.monotonic()
+        response = self.buy("order-1")
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(IdempotencyKey.objects.get().status, "DONE")
+
+    def test_client_errors_are_replayed_too(self):
+        Product.objects.filter(pk=self.saree.pk).update(quantity=0)
+        self.assertEqual(self.buy("order-1").status_code, 409)
+        self.assertEqual(self.buy("order-1")["Idempotent-Replayed"], "true")
+
+
+# =============================================================
+# STATUS STREAM FAN-OUT
+# =============================================================
+@override_settings(ORDER_EVENTS_POLL_SECONDS=0.01)
+class CacheStatusBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.hub = StatusHub()
+        self.backend = CacheStatusBackend()
+
+    async def poll_once(self):
+        self.backend.ensure_polling(self.hub)
+        await asyncio.sleep(0.05)
+
+    def publish_elsewhere(self, status):
+        # Another worker: only the shared cache sees it
+        event = status_event(1, status)
+        cache.set(_event_key(1), event)
+        return event
+
+    async def test_poller_delivers_events_from_other_workers(self):
+        queue = self.hub.subscribe(1)
+        event = self.publish_elsewhere("SHIPPED")
+        await self.poll_once()
+
+        self.assertEqual(queue.get_nowait(), event)
+        self.assertTrue(queue.empty())
+        self.hub.unsubscribe(1, queue)
+
+    async def test_snapshot_event_is_not_replayed(self):
+        stale = self.publish_elsewhere("PENDING")
+        queue = self.hub.subscribe(1, await self.backend.latest_seq(1))
+        await self.poll_once()
+        self.assertTrue(queue.empty())
+
+        newer = self.publish_elsewhere("CANCELLED")
+        await self.poll_once()
+        self.assertEqual(queue.get_nowait(), newer)
+        self.assertNotEqual(stale["seq"], newer["seq"])
+        self.hub.unsubscribe(1, queue)
+
+
+# =============================================================
+# EXPLAIN CHECKS
+# =============================================================
+@postgres_only
+class OrderIndexTests(IndexScanMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Sarees", slug="sarees")
+        products = Product.objects.bulk_create(
+            Product(name=f"Product {i}", slug=f"product-{i}", mrp=1000, price=900, category=category)
+            for i in range(50)
+        )
+        users = User.objects.bulk_create(
+            User(mobile=f"9{i:09d}") for i in range(SEED_ROWS // 25)
+        )
+        cls.user = users[0]
+        cls.admin = User.objects.create_user("8000000000", is_staff=True)
+
+        statuses = list(Order.TRANSITIONS)
+        Order.objects.bulk_create(
+            Order(user=users[i % len(users)], total_amount=900, status=statuses[i % len(statuses)])
+            for i in range(SEED_ROWS)
+        )
+        Cart.objects.bulk_create(
+            Cart(user=user, product=product, size="M")
+            for user in users
+            for product in products[:SEED_ROWS // len(users)]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_order_history(self):
+        self.client.force_authenticate(self.user)
+        with self.assertIndexedQueries("orders"):
+            self.client.get("/api/orders/list/", {"mode": "summary"})
+
+    def test_admin_status_filter(self):
+        self.client.force_authenticate(self.admin)
+        with self.assertIndexedQueries("orders"):
+            self.client.get("/api/orders/admin/list/", {"status": "SHIPPED"})
+
+    def test_cart(self):
+        self.client.force_authenticate(self.user)
+        with self.assertIndexedQueries("cart"):
+            self.client.get("/api/cart/items/")
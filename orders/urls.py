@@ -2,6 +2,8 @@ from django.urls import path
 from .views import (
     AddToCartView,
     CartView,
+    CartSummaryView,
+    CartBatchView,
     UpdateCartQuantityView,
     UpdateCartSizeView,
     RemoveCartItemView,
@@ -10,14 +12,18 @@ from .views import (
     OrderListView,
     OrderDetailView,
     AdminUpdateOrderStatus,
+    AdminOrderListView,
+    AdminBulkOrderStatusView,
 )
 
 urlpatterns = [
     # CART
     path("items/", CartView.as_view()),                      # GET
+    path("summary/", CartSummaryView.as_view()),             # GET
     path("add/", AddToCartView.as_view()),           # POST
     path("update/quantity/", UpdateCartQuantityView.as_view()),
     path("update/size/", UpdateCartSizeView.as_view()),
+    path("batch/", CartBatchView.as_view()),                 # POST
     path("remove/<int:cart_id>/", RemoveCartItemView.as_view()),
 
     # ORDERS
@@ -25,4 +31,8 @@ urlpatterns = [
     path("details/<int:order_id>/", OrderDetailView.as_view()),
     path("buy-now/", BuyNowView.as_view()),
     path("checkout/", PlaceOrderFromCartView.as_view()),
+
+    # ADMIN
+    path("admin/list/", AdminOrderListView.as_view()),
+    path("admin/status/bulk/", AdminBulkOrderStatusView.as_view()),
 ]
\ No newline at end of file
@@ -2,10 +2,24 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.db import transaction
-
+from django.db.models import Count, F, Sum, Window
+from django.db.models.functions import Coalesce
+
+from .cache import get_cart_summary, invalidate_cart_summary, set_cart_summary
+from .cart_ops import (
+    CART_BATCH_LIMIT, add_to_cart, apply_cart_operations, change_cart_size
+)
+from .fulfilment import BULK_STATUS_LIMIT, bulk_transition, filter_orders
+from .idempotency import idempotent
 from .models import Cart, Order, OrderItem
-from .serializers import CartSerializer, OrderSerializer
+from .serializers import (
+    AdminOrderSerializer, CartSerializer, OrderSerializer, OrderSummarySerializer
+)
+from .status_events import publish_order_status
+from .stock import OutOfStock, release_stock, reserve_stock
 from products.models import Product
+from products.pagination import KeysetPagination
+from products.popularity import record_sales
 from users.models import Address
 
 
@@ -26,27 +40,32 @@ class AddToCartView(APIView):
                 status=400
             )
 
-        try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
-            return Response({"error": "Invalid product"}, status=404)
-
         if quantity < 1:
             return Response({"error": "Invalid quantity"}, status=400)
 
-        cart_item, created = Cart.objects.get_or_create(
-            user=request.user,
-            product=product,
-            size=size
-        )
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid product"}, status=404)
 
-        cart_item.quantity = (
-            cart_item.quantity + quantity if not created else quantity
-        )
-        cart_item.save()
+        # Single INSERT ... ON CONFLICT DO UPDATE (see orders/cart_ops.py)
+        row = add_to_cart(request.user.id, product_id, size, quantity)
+        if row is None:
+            return Response({"error": "Invalid product"}, status=404)
+
+        invalidate_cart_summary(request.user.id)
 
+        cart_id, cart_quantity = row
         return Response(
-            {"message": "Added to cart", "cart": CartSerializer(cart_item).data},
+            {
+                "message": "Added to cart",
+                "cart": {
+                    "id": cart_id,
+                    "product": product_id,
+                    "size": size,
+                    "quantity": cart_quantity
+                }
+            },
             status=200
         )
 
@@ -58,13 +77,80 @@ class CartView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        cart_items = Cart.objects.filter(user=request.user)
+        cart_items = CartSerializer.optimize(Cart.objects.filter(user=request.user))
         return Response(
             {"cart": CartSerializer(cart_items, many=True).data},
             status=200
         )
 
 
+# ==================================================
+# 🔢 CART SUMMARY (HEADER BADGE)
+# ==================================================
+def build_cart_summary(user):
+    """
+    Counts and totals in one aggregate query; no cart rows are loaded.
+    Prices match checkout (product.price); savings are against MRP.
+    """
+    totals = Cart.objects.filter(user=user).aggregate(
+        line_count=Count("id"),
+        item_count=Coalesce(Sum("quantity"), 0),
+        subtotal=Coalesce(Sum(F("quantity") * F("product__price")), 0),
+        mrp_total=Coalesce(Sum(F("quantity") * F("product__mrp")), 0),
+    )
+    return {
+        "line_count": totals["line_count"],
+        "item_count": totals["item_count"],
+        "subtotal": totals["subtotal"],
+        "savings": max(0, totals["mrp_total"] - totals["subtotal"]),
+    }
+
+
+class CartSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        summary = get_cart_summary(request.user.id)
+
+        if summary is None:
+            summary = build_cart_summary(request.user)
+            set_cart_summary(request.user.id, summary)
+
+        return Response(summary, status=200)
+
+
+# ==================================================
+# 📦 BATCH CART CHANGES (e.g. guest cart merge at login)
+# ==================================================
+class CartBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        operations = request.data.get("operations")
+
+        if not isinstance(operations, list) or not operations:
+            return Response({"error": "operations list required"}, status=400)
+
+        if len(operations) > CART_BATCH_LIMIT:
+            return Response(
+                {"error": f"At most {CART_BATCH_LIMIT} operations per request"},
+                status=400
+            )
+
+        try:
+            apply_cart_operations(request.user.id, operations)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        invalidate_cart_summary(request.user.id)
+
+        cart_items = CartSerializer.optimize(Cart.objects.filter(user=request.user))
+        return Response(
+            {"message": "Cart updated", "cart": CartSerializer(cart_items, many=True).data},
+            status=200
+        )
+
+
 # ==================================================
 # 🔁 UPDATE QUANTITY
 # ==================================================
@@ -86,10 +172,12 @@ class UpdateCartQuantityView(APIView):
         quantity = int(quantity)
         if quantity < 1:
             cart.delete()
+            invalidate_cart_summary(request.user.id)
             return Response({"message": "Item removed"}, status=200)
 
         cart.quantity = quantity
         cart.save()
+        invalidate_cart_summary(request.user.id)
 
         return Response({"message": "Quantity updated"}, status=200)
 
@@ -107,26 +195,17 @@ class UpdateCartSizeView(APIView):
         if not cart_id or not new_size:
             return Response({"error": "cart_id and size required"}, status=400)
 
-        try:
-            cart_item = Cart.objects.get(id=cart_id, user=request.user)
-        except Cart.DoesNotExist:
+        # Merge-or-move in one statement on PostgreSQL (see orders/cart_ops.py)
+        row = change_cart_size(request.user.id, cart_id, new_size)
+        if row is None:
             return Response({"error": "Cart item not found"}, status=404)
 
-        existing = Cart.objects.filter(
-            user=request.user,
-            product=cart_item.product,
-            size=new_size
-        ).exclude(id=cart_item.id).first()
-
-        if existing:
-            existing.quantity += cart_item.quantity
-            existing.save()
-            cart_item.delete()
-        else:
-            cart_item.size = new_size
-            cart_item.save()
+        invalidate_cart_summary(request.user.id)
 
-        return Response({"message": "Size updated"}, status=200)
+        return Response(
+            {"message": "Size updated", "cart_id": row[0], "quantity": row[1]},
+            status=200
+        )
 
 
 # ==================================================
@@ -139,6 +218,7 @@ class RemoveCartItemView(APIView):
         try:
             cart = Cart.objects.get(id=cart_id, user=request.user)
             cart.delete()
+            invalidate_cart_summary(request.user.id)
             return Response({"message": "Item removed"}, status=200)
         except Cart.DoesNotExist:
             return Response({"error": "Item not found"}, status=404)
@@ -150,6 +230,7 @@ class RemoveCartItemView(APIView):
 class BuyNowView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent
     @transaction.atomic
     def post(self, request):
         product_id = request.data.get("product_id")
@@ -169,12 +250,24 @@ class BuyNowView(APIView):
         except (Product.DoesNotExist, Address.DoesNotExist):
             return Response({"error": "Invalid product or address"}, status=404)
 
-        total = product.price * max(1, quantity)
+        quantity = max(1, quantity)
+
+        try:
+            reserve_stock([(product.id, quantity)])
+        except OutOfStock as exc:
+            return Response(
+                {"error": "Out of stock", "product_ids": exc.product_ids},
+                status=409
+            )
+
+        total = product.price * quantity
 
         order = Order.objects.create(
             user=request.user,
             address=address,
-            total_amount=total
+            total_amount=total,
+            stock_reserved=True,
+            **Order.summary_fields([product])
         )
 
         OrderItem.objects.create(
@@ -184,6 +277,7 @@ class BuyNowView(APIView):
             quantity=quantity,
             price=product.price
         )
+        record_sales([(product.id, quantity)])
 
         return Response(
             {"message": "Order created", "order": OrderSerializer(order).data},
@@ -197,7 +291,7 @@ class BuyNowView(APIView):
 class PlaceOrderFromCartView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
+    @idempotent
     def post(self, request):
         address_id = request.data.get("address_id")
 
@@ -212,33 +306,61 @@ class PlaceOrderFromCartView(APIView):
         except Address.DoesNotExist:
             return Response({"error": "Invalid address"}, status=404)
 
-        cart_items = Cart.objects.filter(user=request.user).select_related("product")
-        if not cart_items.exists():
-            return Response({"error": "Cart is empty"}, status=400)
-
-        total = 0
-        for item in cart_items:
-            total += item.product.price * item.quantity
-
-        order = Order.objects.create(
-            user=request.user,
-            address=address,
-            total_amount=total
+        # Cart rows + the order total in ONE query (same snapshot), read
+        # before the transaction opens; products come with everything the
+        # response serializer needs
+        line_total = F("quantity") * F("product__price")
+        cart_items = list(
+            Cart.objects.filter(user=request.user)
+            .select_related("product__category")
+            .annotate(order_total=Window(Sum(line_total)))
         )
+        if not cart_items:
+            return Response({"error": "Cart is empty"}, status=400)
 
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                size=item.size,
-                quantity=item.quantity,
-                price=item.product.price
+        lines = [(item.product_id, item.quantity) for item in cart_items]
+
+        with transaction.atomic():
+            try:
+                reserve_stock(lines)
+            except OutOfStock as exc:
+                return Response(
+                    {"error": "Out of stock", "product_ids": exc.product_ids},
+                    status=409
+                )
+
+            order = Order.objects.create(
+                user=request.user,
+                address=address,
+                total_amount=cart_items[0].order_total,
+                stock_reserved=True,
+                **Order.summary_fields([item.product for item in cart_items])
             )
 
-        cart_items.delete()
+            items = OrderItem.objects.bulk_create([
+                OrderItem(
+                    order=order,
+                    product=item.product,
+                    size=item.size,
+                    quantity=item.quantity,
+                    price=item.product.price
+                )
+                for item in cart_items
+            ])
+
+            record_sales(lines)
+            # Only the rows that were ordered; a line added meanwhile stays
+            Cart.objects.filter(id__in=[item.id for item in cart_items]).delete()
+
+            # After commit, so a concurrent badge request cannot re-cache the old cart
+            user_id = request.user.id
+            transaction.on_commit(lambda: invalidate_cart_summary(user_id))
 
         return Response(
-            {"message": "Order placed", "order": OrderSerializer(order).data},
+            {
+                "message": "Order placed",
+                "order": OrderSerializer(order, context={"items": items}).data
+            },
             status=201
         )
 
@@ -246,13 +368,36 @@ class PlaceOrderFromCartView(APIView):
 # ==================================================
 # 📜 USER ORDERS
 # ==================================================
+ORDER_PAGE_SIZE = 10
+
+
 class OrderListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         orders = Order.objects.filter(user=request.user)
+
+        # ?mode=summary: list cards straight from the orders table
+        if request.GET.get("mode") == "summary":
+            serializer_class = OrderSummarySerializer
+            orders = orders.only(*OrderSummarySerializer.Meta.fields)
+        else:
+            serializer_class = OrderSerializer
+            orders = OrderSerializer.optimize(orders)
+
+        # Newest first, cursor on id (backed by the (user, -id) index)
+        paginator = KeysetPagination(("-id",), page_size=ORDER_PAGE_SIZE)
+        try:
+            page = paginator.paginate_queryset(orders, request)
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=400)
+
         return Response(
-            {"orders": OrderSerializer(orders, many=True).data},
+            {
+                "orders": serializer_class(page, many=True).data,
+                "next": paginator.get_next_link(),
+                "cursor": paginator.next_cursor,
+            },
             status=200
         )
 
@@ -265,7 +410,7 @@ class OrderDetailView(APIView):
 
     def get(self, request, order_id):
         try:
-            order = Order.objects.get(
+            order = OrderSerializer.optimize(Order.objects).get(
                 id=order_id,
                 user=request.user
             )
@@ -308,7 +453,72 @@ class AdminUpdateOrderStatus(APIView):
         order.status = status_value
         order.save()
 
+        if status_value == "CANCELLED":
+            release_stock(order)
+
+        publish_order_status(order.id, status_value)
+
         return Response(
             {"message": "Order status updated"},
             status=200
         )
+
+
+# ==================================================
+# 🗂 ADMIN ORDER CONSOLE
+# ==================================================
+class AdminOrderListView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            orders = filter_orders(Order.objects.all(), request.GET)
+        except ValueError:
+            return Response({"error": "Invalid filters"}, status=400)
+
+        # Matches the (status, -created_at, -id) index
+        paginator = KeysetPagination(("-created_at", "-id"))
+        try:
+            page = paginator.paginate_queryset(AdminOrderSerializer.optimize(orders), request)
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=400)
+
+        return paginator.get_paginated_response(
+            AdminOrderSerializer(page, many=True).data
+        )
+
+
+class AdminBulkOrderStatusView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        order_ids = request.data.get("order_ids")
+        status_value = request.data.get("status")
+
+        if status_value not in Order.TRANSITIONS:
+            return Response({"error": "Invalid status"}, status=400)
+
+        try:
+            if not isinstance(order_ids, list):
+                raise TypeError
+            order_ids = [int(order_id) for order_id in order_ids]
+        except (TypeError, ValueError):
+            return Response({"error": "order_ids must be a list of ids"}, status=400)
+
+        if not order_ids or len(order_ids) > BULK_STATUS_LIMIT:
+            return Response(
+                {"error": f"Send between 1 and {BULK_STATUS_LIMIT} order_ids"},
+                status=400
+            )
+
+        updated, skipped = bulk_transition(order_ids, status_value)
+
+        return Response(
+            {
+                "message": "Order status updated",
+                "updated": updated,
+                # not found, or the current status cannot move to `status`
+                "skipped": skipped
+            },
+            status=200
+        )
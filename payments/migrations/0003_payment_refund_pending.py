@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_remove_payment_is_paid_remove_payment_payment_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='status',
+            field=models.CharField(choices=[('CREATED', 'Created'), ('PAID', 'Paid'), ('FAILED', 'Failed'), ('REFUND_PENDING', 'Refund pending')], default='CREATED', max_length=20),
+        ),
+    ]
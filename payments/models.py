@@ -8,6 +8,8 @@ class Payment(models.Model):
         ("CREATED", "Created"),
         ("PAID", "Paid"),
         ("FAILED", "Failed"),
+        # Paid after the order lost its stock reservation
+        ("REFUND_PENDING", "Refund pending"),
     )
 
     order = models.OneToOneField(
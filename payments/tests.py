@@ -1,3 +1,134 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from orders.models import Order
+from orders.tests import make_address, stock
+from products.tests import make_product
+from users.models import User
+
+from .models import Payment
+from .views import make_stream_token, read_stream_token
+
+
+# =============================================================
+# CREATE RAZORPAY ORDER
+# =============================================================
+@mock.patch("payments.views.razorpay.Client")
+class CreateRazorpayOrderTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("9000000021")
+        cls.address = make_address(cls.user)
+        cls.saree = make_product("Saree", quantity=3)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, quantity=1):
+        return self.client.post(
+            "/api/payments/razorpay/create/",
+            {"product_id": self.saree.id, "size": "M", "quantity": quantity,
+             "address_id": self.address.id},
+            format="json"
+        )
+
+    def test_razorpay_is_called_before_stock_is_reserved(self, client_class):
+        # The HTTP round trip must not run while the product row is locked
+        seen = []
+
+        def create_order(data):
+            seen.append(stock(self.saree))
+            return {"id": "order_rz_1"}
+
+        client_class.return_value.order.create.side_effect = create_order
+
+        response = self.create(quantity=2)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(seen, [[3]])
+        self.assertEqual(stock(self.saree), [1])
+        payment = Payment.objects.get(razorpay_order_id="order_rz_1")
+        self.assertEqual(payment.order_id, response.data["order_id"])
+        self.assertTrue(payment.order.stock_reserved)
+
+    def test_razorpay_failure_reserves_nothing(self, client_class):
+        client_class.return_value.order.create.side_effect = ConnectionError
+
+        with self.assertRaises(ConnectionError):
+            self.create()
+
+        self.assertEqual(stock(self.saree), [3])
+        self.assertFalse(Order.objects.exists())
+
+    def test_out_of_stock_skips_razorpay(self, client_class):
+        response = self.create(quantity=4)
+
+        self.assertEqual(response.status_code, 409)
+        client_class.return_value.order.create.assert_not_called()
+        self.assertFalse(Order.objects.exists())
+
+
+# =============================================================
+# ORDER STATUS STREAM
+# =============================================================
+@override_settings(
+    ORDER_EVENTS_BACKEND="orders.status_events.LocalStatusBackend",
+    ORDER_EVENTS_STREAM_SECONDS=0
+)
+class OrderStatusStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("9000000022")
+        cls.other = User.objects.create_user("9000000023")
+        cls.order = Order.objects.create(
+            user=cls.user, address=make_address(cls.user), total_amount=900
+        )
+        cls.url = f"/api/payments/order-status/{cls.order.id}/stream/"
+
+    def test_token_is_bound_to_its_order(self):
+        token = make_stream_token(self.user.id, self.order.id)
+        self.assertEqual(read_stream_token(token, self.order.id), self.user.id)
+        self.assertIsNone(read_stream_token(token, self.order.id + 1))
+        self.assertIsNone(read_stream_token(token + "x", self.order.id))
+
+    @override_settings(ORDER_EVENTS_TOKEN_SECONDS=-1)
+    def test_expired_token_is_rejected(self):
+        token = make_stream_token(self.user.id, self.order.id)
+        self.assertIsNone(read_stream_token(token, self.order.id))
+
+    def test_token_endpoint_only_serves_own_orders(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f"/api/payments/order-status/{self.order.id}/stream-token/"
+
+        response = client.post(url)
+        self.assertEqual(read_stream_token(response.data["token"], self.order.id), self.user.id)
+
+        client.force_authenticate(self.other)
+        self.assertEqual(client.post(url).status_code, 404)
+
+    def test_wsgi_request_is_refused(self):
+        token = make_stream_token(self.user.id, self.order.id)
+        response = self.client.get(self.url, {"token": token})
+        self.assertEqual(response.status_code, 501)
+
+    async def test_stream_starts_with_the_current_status(self):
+        token = make_stream_token(self.user.id, self.order.id)
+        response = await AsyncClient().get(self.url, {"token": token})
+
+        self.assertEqual(response.status_code, 200)
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        event = json.loads(body.split("data: ", 1)[1].split("\n", 1)[0])
+        self.assertEqual((event["order_id"], event["status"]), (self.order.id, "PENDING"))
+
+    async def test_jwt_in_the_url_is_not_accepted(self):
+        jwt = str(AccessToken.for_user(self.user))
+        response = await AsyncClient().get(self.url, {"token": jwt})
+        self.assertEqual(response.status_code, 401)
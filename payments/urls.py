@@ -3,7 +3,9 @@ from .views import (
     CreateRazorpayOrder,
     razorpay_callback,
     razorpay_webhook,
-    OrderStatusAPIView
+    OrderStatusAPIView,
+    StreamTokenAPIView,
+    order_status_stream
 )
 
 urlpatterns = [
@@ -11,4 +13,6 @@ urlpatterns = [
     path("razorpay/callback/", razorpay_callback),
     path("razorpay/webhook/", razorpay_webhook),
     path("order-status/<int:order_id>/", OrderStatusAPIView.as_view()),
+    path("order-status/<int:order_id>/stream-token/", StreamTokenAPIView.as_view()),
+    path("order-status/<int:order_id>/stream/", order_status_stream),
 ]
\ No newline at end of file
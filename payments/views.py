@@ -206,14 +206,19 @@
 #             pass
 
 #     return HttpResponse(status=200)
+import asyncio
 import json
 import hmac
 import hashlib
+import time
 import razorpay
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.views.decorators.csrf import csrf_exempt
 
@@ -221,10 +226,18 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from orders.idempotency import idempotent
 from orders.models import Order, OrderItem
+from orders.status_events import (
+    get_backend, publish_order_status, status_event, status_hub
+)
+from orders.stock import OutOfStock, confirm_paid_order, reserve_stock
+from products.popularity import record_sales
 from products.models import Product
-from users.models import Address
+from users.models import Address, User
 from .models import Payment
 
 
@@ -234,7 +247,8 @@ from .models import Payment
 class CreateRazorpayOrder(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
+    # Retries replay the first Razorpay order instead of creating another
+    @idempotent
     def post(self, request):
         product_id = request.data.get("product_id")
         size = request.data.get("size")
@@ -260,28 +274,14 @@ class CreateRazorpayOrder(APIView):
         total_rupees = product.price * quantity
         total_paise = int(total_rupees * 100)
 
-        # 🧾 Create Order
-        order = Order.objects.create(
-            user=request.user,
-            address=address,
-            total_amount=total_rupees
-        )
-
-        OrderItem.objects.create(
-            order=order,
-            product=product,
-            size=size,
-            quantity=quantity,
-            price=product.price
-        )
-
-        # 🔒 Prevent duplicate payment
-        if hasattr(order, "payment"):
+        # Cheap early exit; the reservation below is the real check
+        if product.quantity < quantity:
             return Response(
-                {"error": "Payment already initiated"},
-                status=400
+                {"error": "Out of stock", "product_ids": [product.id]},
+                status=409
             )
 
+        # 🌐 Razorpay round trip BEFORE any row lock is taken
         client = razorpay.Client(
             auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
         )
@@ -291,11 +291,41 @@ class CreateRazorpayOrder(APIView):
             "currency": "INR"
         })
 
-        Payment.objects.create(
-            order=order,
-            razorpay_order_id=razorpay_order["id"],
-            status="CREATED"
-        )
+        # 📦 Hold stock until payment (released after the TTL if unpaid).
+        # The product row stays locked only for these few statements; if
+        # the stock ran out meanwhile the Razorpay order is never paid.
+        with transaction.atomic():
+            try:
+                reserve_stock([(product.id, quantity)])
+            except OutOfStock as exc:
+                return Response(
+                    {"error": "Out of stock", "product_ids": exc.product_ids},
+                    status=409
+                )
+
+            # 🧾 Create Order
+            order = Order.objects.create(
+                user=request.user,
+                address=address,
+                total_amount=total_rupees,
+                stock_reserved=True,
+                **Order.summary_fields([product])
+            )
+
+            OrderItem.objects.create(
+                order=order,
+                product=product,
+                size=size,
+                quantity=quantity,
+                price=product.price
+            )
+            record_sales([(product.id, quantity)])
+
+            Payment.objects.create(
+                order=order,
+                razorpay_order_id=razorpay_order["id"],
+                status="CREATED"
+            )
 
         return Response({
             "order_id": order.id,
@@ -308,6 +338,34 @@ class CreateRazorpayOrder(APIView):
         }, status=201)
 
 
+# ======================================================
+# 💰 MARK PAID (CALLBACK + WEBHOOK)
+# ======================================================
+@transaction.atomic
+def mark_paid(payment, razorpay_payment_id):
+    """
+    The order is confirmed only if it still holds (or can re-reserve)
+    its stock; otherwise the payment is flagged for refund.
+    The payment row is re-read under a lock so a callback and a webhook
+    for the same payment are applied once.
+    """
+    payment = Payment.objects.select_for_update().get(pk=payment.pk)
+    if payment.status in ("PAID", "REFUND_PENDING"):
+        return
+
+    if confirm_paid_order(payment.order_id):
+        payment.status = "PAID"
+        order_status = "CONFIRMED"
+    else:
+        payment.status = "REFUND_PENDING"
+        order_status = "CANCELLED"
+
+    payment.razorpay_payment_id = razorpay_payment_id
+    payment.save()
+
+    publish_order_status(payment.order_id, order_status, payment.status)
+
+
 # ======================================================
 # ✅ VERIFY PAYMENT (REDIRECT CALLBACK)
 # ======================================================
@@ -337,13 +395,8 @@ def razorpay_callback(request):
     # ✅ Payment verified (DO NOT WAIT FOR FRONTEND)
     try:
         payment = Payment.objects.get(razorpay_order_id=razorpay_order_id)
-        payment.status = "PAID"
-        payment.razorpay_payment_id = razorpay_payment_id
-        payment.save()
-
-        order = payment.order
-        order.status = "CONFIRMED"
-        order.save()
+        if payment.status not in ("PAID", "REFUND_PENDING"):
+            mark_paid(payment, razorpay_payment_id)
     except Payment.DoesNotExist:
         pass
 
@@ -384,19 +437,15 @@ def razorpay_webhook(request):
         return HttpResponse(status=200)
 
     if event in ["payment.captured", "order.paid"]:
-        if payment.status != "PAID":
-            payment.status = "PAID"
-            payment.razorpay_payment_id = razorpay_payment_id
-            payment.save()
-
-            order = payment.order
-            order.status = "CONFIRMED"
-            order.save()
+        if payment.status not in ("PAID", "REFUND_PENDING"):
+            mark_paid(payment, razorpay_payment_id)
 
     elif event == "payment.failed":
         payment.status = "FAILED"
         payment.save()
 
+        publish_order_status(payment.order_id, payment.order.status, payment.status)
+
     return HttpResponse(status=200)
 
 class OrderStatusAPIView(APIView):
@@ -413,4 +462,138 @@ class OrderStatusAPIView(APIView):
             return Response(
                 {"error": "Order not found"},
                 status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+
+
+# ======================================================
+# 📡 ORDER STATUS STREAM (SERVER-SENT EVENTS, ASGI)
+# ======================================================
+def _sse(event):
+    return f"event: status\ndata: {json.dumps(event)}\n\n"
+
+
+# EventSource cannot send headers, so the stream also accepts a signed
+# token in the URL. It is minted per order by StreamTokenAPIView and
+# expires quickly, unlike the day-long JWT, because URLs end up in logs.
+STREAM_TOKEN_SALT = "payments.order-status-stream"
+
+
+def make_stream_token(user_id, order_id):
+    return signing.dumps({"user": user_id, "order": order_id}, salt=STREAM_TOKEN_SALT)
+
+
+def read_stream_token(token, order_id):
+    """
+    User id the token was issued to, or None if it is forged, expired
+    or was issued for another order
+    """
+    try:
+        data = signing.loads(
+            token, salt=STREAM_TOKEN_SALT, max_age=settings.ORDER_EVENTS_TOKEN_SECONDS
+        )
+    except signing.BadSignature:
+        return None
+    if not isinstance(data, dict) or data.get("order") != order_id:
+        return None
+    return data.get("user")
+
+
+class StreamTokenAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, order_id):
+        if not Order.objects.filter(id=order_id, user=request.user).exists():
+            return Response(
+                {"error": "Order not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        return Response({
+            "token": make_stream_token(request.user.id, order_id),
+            "expires_in": settings.ORDER_EVENTS_TOKEN_SECONDS
+        })
+
+
+@sync_to_async
+def _stream_user(request, order_id):
+    """
+    JWT from the Authorization header, or ?token= from StreamTokenAPIView
+    """
+    raw_token = request.GET.get("token")
+    if raw_token:
+        user_id = read_stream_token(raw_token, order_id)
+        if user_id is None:
+            return None
+        return User.objects.filter(pk=user_id, is_active=True).first()
+
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+async def order_status_stream(request, order_id):
+    """
+    Pushes the order's status as soon as the webhook, the payment callback
+    or an admin changes it, instead of the client polling OrderStatusAPIView.
+    The stream ends after ORDER_EVENTS_STREAM_SECONDS; EventSource then
+    reconnects on its own and gets the current state first (with a fresh
+    stream token, since the first one has expired by then).
+
+    Needs an ASGI server (see saptrangi_backend/asgi.py): under WSGI Django
+    drains the whole async iterator before sending a byte, so the client
+    would see nothing until the stream ends. WSGI requests get a 501.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"error": "Status streaming needs an ASGI deployment; poll order-status instead"},
+            status=501
+        )
+
+    user = await _stream_user(request, order_id)
+    if user is None:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+
+    backend = get_backend()
+    seen_seq = await backend.latest_seq(order_id)
+
+    current = await Order.objects.filter(
+        id=order_id, user=user
+    ).values("status", "payment__status").afirst()
+
+    if current is None:
+        return JsonResponse({"error": "Order not found"}, status=404)
+
+    queue = status_hub.subscribe(order_id, seen_seq)
+    backend.ensure_polling(status_hub)
+
+    async def events():
+        deadline = time.monotonic() + settings.ORDER_EVENTS_STREAM_SECONDS
+        try:
+            yield "retry: 3000\n\n"
+            yield _sse(status_event(
+                order_id, current["status"], current["payment__status"]
+            ))
+
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(),
+                        min(remaining, settings.ORDER_EVENTS_KEEPALIVE_SECONDS)
+                    )
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(event)
+        finally:
+            status_hub.unsubscribe(order_id, queue)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,224 @@
+import threading
+import uuid
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+
+
+SUGGEST_VERSION_KEY = "products:suggest:version"
+SUGGEST_SEQ_KEY = "products:suggest:seq"
+SUGGEST_LIMIT = 8
+MAX_SCAN = 200
+
+# Product changes are kept this long for other workers to replay; a worker
+# further behind than MAX_REPLAY changes rebuilds instead
+CHANGE_TIMEOUT = 60 * 60
+MAX_REPLAY = 500
+
+
+def normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+def word_suffixes(text):
+    """
+    "banarasi silk saree" -> ["banarasi silk saree", "silk saree", "saree"]
+    so a prefix matches the start of any word.
+    """
+    words = normalize(text).split(" ")
+    return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+def _change_key(version, seq):
+    return f"products:suggest:{version}:change:{seq}"
+
+
+# =============================================================
+# PER-WORKER PREFIX INDEX
+# =============================================================
+class PrefixIndex:
+    """
+    Compact prefix index: per kind, one sorted list of (key, id) tuples.
+    A prefix lookup is a bisect to the first key >= prefix and a short
+    forward scan while keys still start with it.
+
+    Each worker holds its own copy. Product writes are appended to a
+    numbered changelog in the shared cache and every worker (including
+    the writer) replays the entries it has not seen on its next lookup.
+    Bulk and category writes rotate the version token instead, which
+    makes every worker rebuild from the database.
+    """
+
+    KINDS = ("category", "product")
+
+    def __init__(self):
+        self.keys = {kind: [] for kind in self.KINDS}
+        self.labels = {}      # (kind, id) -> {"type", "label", "slug"}
+        self.version = None
+        self.seq = 0          # last changelog entry applied
+        self.lock = threading.RLock()
+
+    # ---------------------------------------------------------
+    # BUILD / UPDATE
+    # ---------------------------------------------------------
+    def rebuild(self, version, seq):
+        """
+        `version`/`seq` are read BEFORE the tables: a change landing during
+        the rebuild is replayed again later, and upserts are idempotent.
+        """
+        from .models import Category, Product
+
+        keys = {kind: [] for kind in self.KINDS}
+        labels = {}
+
+        sources = (
+            ("category", Category.objects.values("id", "name", "slug")),
+            ("product", Product.objects.values("id", "name", "slug")),
+        )
+        for kind, rows in sources:
+            for row in rows:
+                labels[(kind, row["id"])] = {
+                    "type": kind, "label": row["name"], "slug": row["slug"]
+                }
+                keys[kind].extend((key, row["id"]) for key in word_suffixes(row["name"]))
+            keys[kind].sort()
+
+        with self.lock:
+            self.keys = keys
+            self.labels = labels
+            self.version = version
+            self.seq = seq
+
+    def replay(self, version, seq):
+        """
+        Apply the shared changelog up to `seq`. Returns False when that is
+        not possible (other version, entries expired or evicted, too far
+        behind, counter reset) and the caller has to rebuild.
+        """
+        with self.lock:
+            if version != self.version or seq < self.seq:
+                return False
+            if seq == self.seq:
+                return True
+            if seq - self.seq > MAX_REPLAY:
+                return False
+
+            keys = [_change_key(version, n) for n in range(self.seq + 1, seq + 1)]
+            changes = cache.get_many(keys)
+            if len(changes) != len(keys):
+                return False
+
+            for key in keys:
+                change = changes[key]
+                if change["label"] is None:
+                    self.remove("product", change["pk"])
+                else:
+                    self.upsert("product", change["pk"], change["label"], change["slug"])
+            self.seq = seq
+            return True
+
+    def remove(self, kind, pk):
+        entry = self.labels.pop((kind, pk), None)
+        if entry is None:
+            return
+        keys = self.keys[kind]
+        for key in word_suffixes(entry["label"]):
+            position = bisect_left(keys, (key, pk))
+            if position < len(keys) and keys[position] == (key, pk):
+                del keys[position]
+
+    def upsert(self, kind, pk, label, slug):
+        self.remove(kind, pk)
+        self.labels[(kind, pk)] = {"type": kind, "label": label, "slug": slug}
+        for key in word_suffixes(label):
+            insort(self.keys[kind], (key, pk))
+
+    # ---------------------------------------------------------
+    # LOOKUP
+    # ---------------------------------------------------------
+    def lookup(self, prefix, limit):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        matches = {}
+
+        with self.lock:
+            for kind in self.KINDS:
+                keys, found, seen = self.keys[kind], [], set()
+                position = bisect_left(keys, (prefix,))
+                end = min(len(keys), position + MAX_SCAN)
+
+                while position < end and keys[position][0].startswith(prefix):
+                    pk = keys[position][1]
+                    position += 1
+                    if pk not in seen:
+                        seen.add(pk)
+                        found.append(self.labels[(kind, pk)])
+                matches[kind] = found
+
+        # Categories first, then products; whole-name matches before mid-name ones
+        products = sorted(
+            matches["product"],
+            key=lambda item: not normalize(item["label"]).startswith(prefix)
+        )
+        return (matches["category"] + products)[:limit]
+
+
+suggestion_index = PrefixIndex()
+
+
+# =============================================================
+# PUBLIC HELPERS
+# =============================================================
+def shared_state():
+    """
+    (version, seq) of the shared index, in one cache round trip
+    """
+    state = cache.get_many([SUGGEST_VERSION_KEY, SUGGEST_SEQ_KEY])
+    if len(state) < 2:
+        # First use, or evicted: restarting the numbering needs a new
+        # version, otherwise a worker could skip entries it never saw
+        state = {SUGGEST_VERSION_KEY: uuid.uuid4().hex, SUGGEST_SEQ_KEY: 0}
+        cache.set_many(state, None)
+    return state[SUGGEST_VERSION_KEY], state[SUGGEST_SEQ_KEY]
+
+
+def suggest(prefix, limit=SUGGEST_LIMIT):
+    version, seq = shared_state()
+    if not suggestion_index.replay(version, seq):
+        suggestion_index.rebuild(version, seq)
+    return suggestion_index.lookup(prefix, limit)
+
+
+def publish_change(pk, label=None, slug=None):
+    """
+    Append one product change (label None = removed) to the changelog
+    """
+    version, _ = shared_state()
+    try:
+        seq = cache.incr(SUGGEST_SEQ_KEY)
+    except ValueError:
+        # Counter evicted just now: everyone rebuilds (from the database)
+        invalidate_suggestions()
+        return
+    cache.set(
+        _change_key(version, seq),
+        {"pk": pk, "label": label, "slug": slug},
+        CHANGE_TIMEOUT
+    )
+
+
+def index_product(product):
+    publish_change(product.pk, product.name, product.slug)
+
+
+def unindex_product(pk):
+    publish_change(pk)
+
+
+def invalidate_suggestions():
+    """
+    For bulk writes / category changes: every worker rebuilds lazily.
+    """
+    cache.set(SUGGEST_VERSION_KEY, uuid.uuid4().hex, None)
@@ -0,0 +1,223 @@
+import codecs
+import csv
+import json
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .autocomplete import invalidate_suggestions
+from .cache import (
+    bump_catalog_version, invalidate_home_payload, invalidate_product_detail
+)
+from .models import Product
+from .search import update_search_vector
+from .serializers import ProductSerializer, save_category
+
+
+# Columns accepted on import and written on export (slug is the upsert key)
+PRODUCT_COLUMNS = [
+    "slug",
+    "name",
+    "mrp",
+    "price",
+    "discount",
+    "category",
+    "fabric",
+    "size",
+    "comfort",
+    "occasion",
+    "quantity",
+    "description",
+    "main_image",
+    "hover_image",
+    "top_picks",
+]
+
+# Export reads related values through the ORM path
+EXPORT_SOURCES = {
+    "category": "category__name",
+}
+
+IMPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 500
+
+
+# =============================================================
+# STREAMING READERS
+# =============================================================
+def iter_csv_rows(file):
+    lines = codecs.iterdecode(file, "utf-8-sig")
+    for row in csv.DictReader(lines):
+        yield row
+
+
+def iter_jsonl_rows(file):
+    for line in codecs.iterdecode(file, "utf-8-sig"):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {"__invalid__": line[:100]}
+
+
+def clean_row(row):
+    """
+    Keep known columns only; blank cells mean "not provided"
+    """
+    return {
+        key: value
+        for key, value in row.items()
+        if key in PRODUCT_COLUMNS and value not in ("", None)
+    }
+
+
+# =============================================================
+# IMPORT (BATCHED UPSERT KEYED BY SLUG)
+# =============================================================
+class ProductImporter:
+    """
+    Validates each row with ProductSerializer rules and upserts in
+    batches: one lookup, one bulk_create and one bulk_update per batch.
+    Signals do not fire for bulk writes, so caches and the search
+    index are refreshed explicitly per batch.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+        self.category_cache = {}
+
+    def run(self, rows):
+        batch = []
+        for line_no, row in enumerate(rows, start=1):
+            batch.append((line_no, row))
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+    def report(self, line_no, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": line_no, "errors": errors})
+
+    def write_batch(self, batch):
+        slugs = [row.get("slug") for _, row in batch if row.get("slug")]
+        existing = Product.objects.in_bulk(slugs, field_name="slug")
+
+        pending = {}          # slug -> Product (new or existing) in this batch
+        new_slugs = set()
+        update_fields = set()
+
+        for line_no, raw in batch:
+            if "__invalid__" in raw:
+                self.report(line_no, {"row": ["Invalid JSON line"]})
+                continue
+
+            row = clean_row(raw)
+            slug = row.pop("slug", None)
+            instance = pending.get(slug) or existing.get(slug)
+
+            serializer = ProductSerializer(
+                instance,
+                data=row,
+                partial=instance is not None,
+                context={"category_cache": self.category_cache}
+            )
+            if not serializer.is_valid():
+                self.report(line_no, serializer.errors)
+                continue
+
+            data = serializer.validated_data
+            if "category" in data:
+                try:
+                    data["category"] = save_category(data["category"])
+                except ValidationError as exc:
+                    self.report(line_no, exc.detail)
+                    continue
+                self.category_cache[data["category"].slug] = data["category"]
+
+            if instance is None:
+                instance = Product(**data)
+                instance.slug = slug
+                instance.ensure_slug()
+                new_slugs.add(instance.slug)
+            else:
+                for field, value in data.items():
+                    setattr(instance, field, value)
+                update_fields.update(data)
+                if set(Product.IMAGE_FIELDS).intersection(data):
+                    update_fields.add("image_variants")
+
+            # bulk writes bypass save()
+            instance.refresh_image_variants()
+
+            pending[instance.slug] = instance
+
+        to_create = [obj for slug, obj in pending.items() if slug in new_slugs]
+        to_update = [obj for slug, obj in pending.items() if slug not in new_slugs]
+
+        with transaction.atomic():
+            Product.objects.bulk_create(to_create, batch_size=self.batch_size)
+            if to_update and update_fields:
+                Product.objects.bulk_update(
+                    to_update, sorted(update_fields), batch_size=self.batch_size
+                )
+            update_search_vector(Product.objects.filter(slug__in=list(pending)))
+
+        self.created += len(to_create)
+        self.updated += len(to_update)
+
+        for slug in pending:
+            invalidate_product_detail(slug)
+        if pending:
+            invalidate_home_payload()
+            bump_catalog_version()
+            invalidate_suggestions()
+
+
+# =============================================================
+# STREAMING EXPORT
+# =============================================================
+class Echo:
+    """
+    File-like object whose write() just returns the value (csv.writer sink)
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_export_rows():
+    return (
+        Product.objects.order_by("id")
+        .values_list(*[EXPORT_SOURCES.get(column, column) for column in PRODUCT_COLUMNS])
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def stream_csv():
+    writer = csv.writer(Echo())
+    yield writer.writerow(PRODUCT_COLUMNS)
+    for row in iter_export_rows():
+        yield writer.writerow(row)
+
+
+def stream_jsonl():
+    for row in iter_export_rows():
+        yield json.dumps(dict(zip(PRODUCT_COLUMNS, row)), ensure_ascii=False) + "\n"
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# =============================================================
+# HOMEPAGE PAYLOAD
+# =============================================================
+# Pre-rendered JSON bytes for HomeView; dropped by signals on any
+# Product / Banner / Carousel write. The timeout is only a safety net.
+HOME_CACHE_KEY = "products:home:payload"
+HOME_CACHE_TIMEOUT = 60 * 60
+
+
+def get_home_payload():
+    return cache.get(HOME_CACHE_KEY)
+
+
+def set_home_payload(payload):
+    cache.set(HOME_CACHE_KEY, payload, HOME_CACHE_TIMEOUT)
+
+
+def invalidate_home_payload():
+    cache.delete(HOME_CACHE_KEY)
+
+
+# =============================================================
+# PRODUCT DETAIL (TWO-TIER: PER-WORKER LRU -> SHARED CACHE -> DB)
+# =============================================================
+class LocalLRU:
+    """
+    Small thread-safe LRU living in the worker process.
+    Values are (version, payload) tuples; a version mismatch is a miss.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CacheStats:
+    def __init__(self, *names):
+        self._counts = dict.fromkeys(names, 0)
+        self._lock = threading.Lock()
+
+    def incr(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+PRODUCT_DETAIL_TIMEOUT = 60 * 60 * 24
+
+product_detail_lru = LocalLRU(settings.PRODUCT_DETAIL_LRU_SIZE)
+product_detail_stats = CacheStats("local_hits", "shared_hits", "misses")
+
+
+def _detail_version_key(slug):
+    return f"products:detail:version:{slug}"
+
+
+def _detail_key(slug, version):
+    return f"products:detail:{slug}:{version}"
+
+
+def product_detail_version(slug):
+    """
+    Current version token for a slug, kept in the shared cache.
+    A missing token is replaced by a fresh one, so stale local copies
+    can never match after the shared entry was lost (or expired).
+
+    Tokens expire like the payloads they guard, so tokens for deleted
+    products and 404 probes do not pile up in the shared cache.
+    """
+    key = _detail_version_key(slug)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, PRODUCT_DETAIL_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_product_detail(slug):
+    """
+    Rotate the slug's version; every worker's LRU copy and the old shared
+    entry become unreachable on their next lookup.
+    """
+    if slug:
+        cache.set(_detail_version_key(slug), uuid.uuid4().hex, PRODUCT_DETAIL_TIMEOUT)
+
+
+def get_product_detail(slug, build):
+    """
+    Read-through lookup. `build(slug)` returns the payload or None (not
+    found); None results are not cached.
+    """
+    version = product_detail_version(slug)
+
+    local = product_detail_lru.get(slug)
+    if local is not None and local[0] == version:
+        product_detail_stats.incr("local_hits")
+        return local[1]
+
+    key = _detail_key(slug, version)
+    payload = cache.get(key)
+    if payload is not None:
+        product_detail_stats.incr("shared_hits")
+        product_detail_lru.set(slug, (version, payload))
+        return payload
+
+    product_detail_stats.incr("misses")
+    payload = build(slug)
+    if payload is None:
+        return None
+
+    cache.set(key, payload, PRODUCT_DETAIL_TIMEOUT)
+    product_detail_lru.set(slug, (version, payload))
+    return payload
+
+
+def product_detail_cache_stats():
+    stats = product_detail_stats.snapshot()
+    lookups = sum(stats.values())
+    hits = stats["local_hits"] + stats["shared_hits"]
+    stats.update({
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0,
+        "local_size": len(product_detail_lru),
+        "local_capacity": product_detail_lru.maxsize,
+    })
+    return stats
+
+
+# =============================================================
+# CATALOG VERSION + FACET COUNTS
+# =============================================================
+# Facet results are cached per filter combination under the current
+# catalog version; any product write rotates the version, which orphans
+# every facet entry at once (they then age out by timeout).
+CATALOG_VERSION_KEY = "products:catalog:version"
+FACETS_TIMEOUT = 60 * 30
+
+
+def catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _facets_key(params):
+    raw = json.dumps(sorted(params.items()), separators=(",", ":"))
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return f"products:facets:{catalog_version()}:{digest}"
+
+
+def get_facets(params):
+    return cache.get(_facets_key(params))
+
+
+def set_facets(params, data):
+    cache.set(_facets_key(params), data, FACETS_TIMEOUT)
+
+
+# =============================================================
+# CATEGORY LIST (with product counts)
+# =============================================================
+# Keyed by catalog version: product and category writes both rotate it.
+CATEGORIES_TIMEOUT = 60 * 60
+
+
+def get_category_list():
+    return cache.get(f"products:categories:{catalog_version()}")
+
+
+def set_category_list(data):
+    cache.set(f"products:categories:{catalog_version()}", data, CATEGORIES_TIMEOUT)
@@ -0,0 +1,148 @@
+import re
+
+from django.db.models import Case, CharField, Count, Q, Value, When
+from django.utils.text import slugify
+
+from .search import search_products
+
+
+# Attribute facets exposed by FacetView (and accepted as listing filters)
+FACET_FIELDS = ("fabric", "size", "comfort", "occasion")
+
+# (label, min inclusive, max exclusive) on the selling price
+PRICE_BUCKETS = (
+    ("0-500", 0, 500),
+    ("500-1000", 500, 1000),
+    ("1000-2000", 1000, 2000),
+    ("2000-5000", 2000, 5000),
+    ("5000+", 5000, None),
+)
+
+
+def bucket_condition(low, high):
+    condition = Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def price_bucket_q(label):
+    for name, low, high in PRICE_BUCKETS:
+        if name == label:
+            return bucket_condition(low, high)
+    return None
+
+
+# =============================================================
+# SHARED LISTING FILTERS
+# =============================================================
+def filter_products(queryset, params):
+    """
+    Filters shared by ProductView and FacetView:
+    category (by slug, so "Sarees" and "sarees" both hit the unique index),
+    fabric/comfort/occasion (exact, case-insensitive),
+    size (sizes are stored comma separated), price_bucket,
+    min_price / max_price (on the stored effective price) and min_discount.
+    """
+    category = params.get("category")
+    if category:
+        queryset = queryset.filter(category__slug=slugify(category))
+
+    for field in ("fabric", "comfort", "occasion"):
+        value = params.get(field)
+        if value:
+            queryset = queryset.filter(**{f"{field}__iexact": value})
+
+    size = (params.get("size") or "").strip()
+    if size:
+        queryset = queryset.filter(size__iregex=size_pattern(size))
+
+    bucket = price_bucket_q(params.get("price_bucket"))
+    if bucket is not None:
+        queryset = queryset.filter(bucket)
+
+    for param, lookup in (
+        ("min_price", "effective_price__gte"),
+        ("max_price", "effective_price__lte"),
+        ("min_discount", "discount__gte"),
+    ):
+        value = parse_number(params.get(param))
+        if value is not None:
+            queryset = queryset.filter(**{lookup: value})
+
+    return queryset
+
+
+def size_pattern(size):
+    """
+    Whole comma-separated item: "S" matches "XS, S" but not "XS" or "XXS"
+    """
+    return rf"(^|,)\s*{re.escape(size)}\s*(,|$)"
+
+
+def parse_number(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+# =============================================================
+# FACET COUNTS
+# =============================================================
+def price_bucket_expression():
+    whens = [
+        When(bucket_condition(low, high), then=Value(name))
+        for name, low, high in PRICE_BUCKETS
+    ]
+    return Case(*whens, default=Value(""), output_field=CharField())
+
+
+def compute_facets(queryset, search=None):
+    """
+    All facet counts from ONE grouped query:
+    GROUP BY fabric, size, comfort, occasion, price_bucket
+    and then folded per facet in Python (rows <= distinct combinations).
+    """
+    if search and search.strip():
+        queryset = queryset.filter(pk__in=search_products(queryset, search).values("pk"))
+
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=price_bucket_expression())
+        .values(*FACET_FIELDS, "price_bucket")
+        .annotate(count=Count("id"))
+    )
+
+    counts = {field: {} for field in FACET_FIELDS}
+    counts["price"] = dict.fromkeys((name for name, _, _ in PRICE_BUCKETS), 0)
+    total = 0
+
+    for row in rows:
+        total += row["count"]
+
+        for field in FACET_FIELDS:
+            if field == "size":
+                values = {part.strip() for part in (row["size"] or "").split(",")}
+            else:
+                values = {(row[field] or "").strip()}
+
+            for value in values - {""}:
+                counts[field][value] = counts[field].get(value, 0) + row["count"]
+
+        if row["price_bucket"]:
+            counts["price"][row["price_bucket"]] += row["count"]
+
+    facets = {
+        field: sorted(
+            ({"value": value, "count": count} for value, count in values.items()),
+            key=lambda item: (-item["count"], item["value"])
+        )
+        for field, values in counts.items()
+        if field != "price"
+    }
+    facets["price"] = [
+        {"value": name, "count": counts["price"][name]} for name, _, _ in PRICE_BUCKETS
+    ]
+
+    return {"total": total, "facets": facets}
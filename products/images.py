@@ -0,0 +1,37 @@
+from urllib.parse import urlsplit
+
+
+# Width buckets (px) for responsive images
+IMAGE_VARIANTS = (
+    ("thumb", 160),
+    ("card", 480),
+    ("detail", 960),
+    ("zoom", 1600),
+)
+
+CLOUDINARY_HOST = "res.cloudinary.com"
+UPLOAD_MARKER = "/upload/"
+
+
+def is_transformable(url):
+    return bool(url) and urlsplit(url).netloc == CLOUDINARY_HOST and UPLOAD_MARKER in url
+
+
+def variant_url(url, width):
+    """
+    Cloudinary delivery URL for `width`, auto format + quality, never upscaled:
+    .../image/upload/v1/x.jpg -> .../image/upload/w_480,c_limit,f_auto,q_auto/v1/x.jpg
+    Pure string work, no network call. Non-Cloudinary URLs are returned as is.
+    """
+    if not is_transformable(url):
+        return url
+
+    head, tail = url.split(UPLOAD_MARKER, 1)
+    return f"{head}{UPLOAD_MARKER}w_{width},c_limit,f_auto,q_auto/{tail}"
+
+
+def build_variants(url):
+    # Nothing to offer for foreign URLs; clients fall back to the raw field
+    if not is_transformable(url):
+        return {}
+    return {name: variant_url(url, width) for name, width in IMAGE_VARIANTS}
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from products.similarity import SIMILAR_TOP_K, rebuild_similarities
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed 'similar products' table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=SIMILAR_TOP_K)
+        parser.add_argument("--batch-size", type=int, default=256)
+
+    def handle(self, *args, **options):
+        try:
+            count = rebuild_similarities(
+                top_k=options["top_k"],
+                batch_size=options["batch_size"]
+            )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} similarity links"))
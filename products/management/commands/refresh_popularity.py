@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from products.popularity import backfill_daily_sales, refresh_popularity
+
+
+class Command(BaseCommand):
+    help = "Slide the best-seller windows forward (run daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="Seed the daily buckets from existing orders first"
+        )
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            backfill_daily_sales()
+
+        count = refresh_popularity()
+        self.stdout.write(self.style.SUCCESS(f"Ranked {count} products"))
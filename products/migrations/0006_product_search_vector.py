@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:48
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def create_search_indexes(apps, schema_editor):
+    # GIN indexes and the backfill are PostgreSQL-only; SQLite uses the icontains fallback
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS product_search_vector_gin "
+        "ON product USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS product_name_trgm_gin "
+        "ON product USING gin (name gin_trgm_ops)"
+    )
+
+    Product = apps.get_model("products", "Product")
+    Product.objects.update(
+        search_vector=(
+            SearchVector("name", weight="A", config="english")
+            + SearchVector("category", weight="B", config="english")
+            + SearchVector("fabric", "occasion", weight="C", config="english")
+            + SearchVector("description", weight="D", config="english")
+        )
+    )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("DROP INDEX IF EXISTS product_search_vector_gin")
+    schema_editor.execute("DROP INDEX IF EXISTS product_name_trgm_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_keyset_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def create_categories(apps, schema_editor):
+    """
+    One Category per distinct product category string; names that only
+    differ by case / punctuation share a slug and are merged.
+    """
+    Category = apps.get_model("products", "Category")
+    Product = apps.get_model("products", "Product")
+
+    names = (
+        Product.objects.order_by()
+        .values_list("category", flat=True)
+        .distinct()
+    )
+
+    for raw_name in names:
+        name = (raw_name or "").strip() or "Uncategorized"
+        slug = slugify(name) or "uncategorized"
+
+        category, _ = Category.objects.get_or_create(
+            slug=slug,
+            defaults={"name": name}
+        )
+        Product.objects.filter(category=raw_name).update(category_ref=category)
+
+
+def restore_category_names(apps, schema_editor):
+    Category = apps.get_model("products", "Category")
+    Product = apps.get_model("products", "Product")
+
+    for category in Category.objects.all():
+        Product.objects.filter(category_ref=category).update(category=category.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('slug', models.SlugField(blank=True, max_length=120, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'category',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='category_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='products.category'),
+        ),
+        # nullable so the column can be re-added empty when migrating backwards
+        migrations.AlterField(
+            model_name='product',
+            name='category',
+            field=models.CharField(db_index=True, max_length=100, null=True),
+        ),
+        migrations.RunPython(create_categories, restore_category_names),
+        migrations.RemoveField(
+            model_name='product',
+            name='category',
+        ),
+        migrations.RenameField(
+            model_name='product',
+            old_name='category_ref',
+            new_name='category',
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='products', to='products.category'),
+        ),
+    ]
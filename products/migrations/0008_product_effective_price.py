@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:54
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('mrp'), '-', django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast(django.db.models.expressions.CombinedExpression(models.F('mrp'), '*', models.F('discount')), models.FloatField()), '/', models.Value(100.0))), output_field=models.FloatField()),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price', 'id'], name='product_eff_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-discount', '-id'], name='product_discount_id_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:55
+
+from django.db import migrations, models
+
+from products.images import build_variants
+
+
+IMAGE_FIELDS = {
+    "Banner": ("banner_image",),
+    "Carousel": ("desktop_image", "mobile_image"),
+    "Product": ("main_image", "hover_image"),
+    "ProductImage": ("image_url",),
+}
+
+
+BATCH_SIZE = 500
+
+
+def backfill_image_variants(apps, schema_editor):
+    """
+    Walk each table by id in batches so memory stays flat on large tables
+    """
+    for model_name, fields in IMAGE_FIELDS.items():
+        Model = apps.get_model("products", model_name)
+        queryset = Model.objects.only("id", *fields).order_by("id")
+
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id)[:BATCH_SIZE])
+            if not rows:
+                break
+
+            for row in rows:
+                variants = {field: build_variants(getattr(row, field)) for field in fields}
+                row.image_variants = {field: urls for field, urls in variants.items() if urls}
+            Model.objects.bulk_update(rows, ["image_variants"])
+            last_id = rows[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_effective_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='banner',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='carousel',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(backfill_image_variants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 06:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='products.product')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_from', to='products.product')),
+            ],
+            options={
+                'db_table': 'product_similarity',
+                'indexes': [models.Index(fields=['product', 'rank'], name='product_similarity_rank_idx')],
+                'unique_together': {('product', 'similar')},
+            },
+        ),
+    ]
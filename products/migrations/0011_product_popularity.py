@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_product_similarity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPopularity',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='products.product')),
+                ('sold_7d', models.IntegerField(default=0)),
+                ('sold_30d', models.IntegerField(default=0)),
+                ('score', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'product_popularity',
+                'indexes': [models.Index(fields=['-score', '-product'], name='product_popularity_score_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='products.product')),
+            ],
+            options={
+                'db_table': 'product_sales_daily',
+                'indexes': [models.Index(fields=['day'], name='product_sales_day_idx')],
+                'unique_together': {('product', 'day')},
+            },
+        ),
+    ]
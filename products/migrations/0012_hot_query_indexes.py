@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_popularity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['top_picks', '-id'], name='product_top_picks_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', '-id'], name='product_category_id_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:25
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_popularity_scores(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductPopularity = apps.get_model("products", "ProductPopularity")
+
+    scores = ProductPopularity.objects.filter(product_id=OuterRef("pk")).values("score")[:1]
+    Product.objects.filter(
+        pk__in=ProductPopularity.objects.values("product_id")
+    ).update(popularity_score=Subquery(scores))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='popularity_score',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-popularity_score', '-id'], name='product_popularity_id_idx'),
+        ),
+        migrations.RunPython(copy_popularity_scores, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,47 @@
 import uuid
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast
 from django.utils.text import slugify
 
+from .images import build_variants
+from .search import SEARCH_FIELDS, update_search_vector
+
+
+class ImageVariantsModel(models.Model):
+    """
+    Caches width-bucketed variant URLs of the IMAGE_FIELDS on the row:
+    {"main_image": {"thumb": url, "card": url, ...}, ...}
+    """
+
+    IMAGE_FIELDS = ()
+
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def refresh_image_variants(self):
+        # Also called directly by bulk paths, which bypass save()
+        variants = {
+            field: build_variants(getattr(self, field)) for field in self.IMAGE_FIELDS
+        }
+        self.image_variants = {field: urls for field, urls in variants.items() if urls}
+
+    def save(self, *args, **kwargs):
+        self.refresh_image_variants()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(self.IMAGE_FIELDS).intersection(update_fields):
+            kwargs["update_fields"] = {*update_fields, "image_variants"}
+
+        super().save(*args, **kwargs)
+
+
+class Carousel(ImageVariantsModel):
+    IMAGE_FIELDS = ("desktop_image", "mobile_image")
 
-class Carousel(models.Model):
     name = models.CharField(max_length=100)
     desktop_image = models.URLField(max_length=500)
     mobile_image = models.URLField(max_length=500)
@@ -15,7 +53,27 @@ class Carousel(models.Model):
         return self.name
 
 
-class Product(models.Model):
+class Category(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    slug = models.SlugField(max_length=120, unique=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "category"
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slugify(self.name)
+        super().save(*args, **kwargs)
+
+
+class Product(ImageVariantsModel):
+    IMAGE_FIELDS = ("main_image", "hover_image")
+
     name = models.CharField(max_length=100)
 
     mrp = models.PositiveIntegerField()
@@ -23,9 +81,21 @@ class Product(models.Model):
     discount = models.PositiveIntegerField(default=0)
     rating = models.FloatField(default=0, editable=False)
 
+    # mrp - mrp * discount / 100, computed and stored by the database so it
+    # can be indexed, filtered and sorted on
+    effective_price = models.GeneratedField(
+        expression=F("mrp") - Cast(F("mrp") * F("discount"), FloatField()) / Value(100.0),
+        output_field=FloatField(),
+        db_persist=True,
+    )
+
     main_image = models.URLField(blank=True)
     hover_image = models.URLField(blank=True)
-    category = models.CharField(max_length=100, db_index=True)
+    category = models.ForeignKey(
+        Category,
+        related_name="products",
+        on_delete=models.PROTECT
+    )
     fabric = models.CharField(max_length=100, blank=True)
     size = models.CharField(max_length=100, blank=True)
     comfort = models.CharField(max_length=100, blank=True)
@@ -39,20 +109,62 @@ class Product(models.Model):
     top_picks = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Maintained on save (PostgreSQL only), GIN indexed
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # Copy of ProductPopularity.score (0 = never sold), kept in step by
+    # products.popularity so sort=popular walks an index on this table
+    popularity_score = models.IntegerField(default=0, editable=False)
+
     class Meta:
         db_table = "product"
         ordering = ["-created_at"]
+        indexes = [
+            # keyset pagination orderings used by ProductView
+            models.Index(fields=["-created_at", "-id"], name="product_created_id_idx"),
+            models.Index(fields=["price", "id"], name="product_price_id_idx"),
+            # effective price range filters, "discount_high" sort
+            models.Index(fields=["effective_price", "id"], name="product_eff_price_id_idx"),
+            models.Index(fields=["-discount", "-id"], name="product_discount_id_idx"),
+            # homepage rails: top picks, newest per category
+            models.Index(fields=["top_picks", "-id"], name="product_top_picks_id_idx"),
+            models.Index(fields=["category", "-id"], name="product_category_id_idx"),
+            # sort=popular and the trending rail
+            models.Index(fields=["-popularity_score", "-id"], name="product_popularity_id_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
-    def save(self, *args, **kwargs):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the typeahead index holds; saves only re-index when it changes
+        instance._loaded_label = instance.suggest_label()
+        return instance
+
+    def suggest_label(self):
+        # __dict__: deferred fields count as unknown instead of being loaded
+        return (self.__dict__.get("name"), self.__dict__.get("slug"))
+
+    def ensure_slug(self):
+        # Also called directly by bulk paths, which bypass save()
         if not self.slug:
             base_slug = slugify(self.name)
             self.slug = f"{base_slug}-{uuid.uuid4().hex[:6]}"
+
+    def save(self, *args, **kwargs):
+        self.ensure_slug()
         super().save(*args, **kwargs)
 
-class ProductImage(models.Model):
+        # Re-index only when a searchable column was written
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or SEARCH_FIELDS.intersection(update_fields):
+            update_search_vector(Product.objects.filter(pk=self.pk))
+
+class ProductImage(ImageVariantsModel):
+    IMAGE_FIELDS = ("image_url",)
+
     product = models.ForeignKey(
         Product,
         related_name="images",
@@ -69,7 +181,9 @@ class ProductImage(models.Model):
 
 
 
-class Banner(models.Model):
+class Banner(ImageVariantsModel):
+    IMAGE_FIELDS = ("banner_image",)
+
     name = models.CharField(max_length=100)
     category = models.CharField(max_length=100, blank=True)
     banner_image = models.URLField(max_length=500)
@@ -79,3 +193,81 @@ class Banner(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class ProductSimilarity(models.Model):
+    """
+    Precomputed "you may also like" neighbours (see products.similarity)
+    """
+    product = models.ForeignKey(
+        Product,
+        related_name="similarities",
+        on_delete=models.CASCADE
+    )
+    similar = models.ForeignKey(
+        Product,
+        related_name="similar_from",
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = "product_similarity"
+        unique_together = ("product", "similar")
+        indexes = [
+            models.Index(fields=["product", "rank"], name="product_similarity_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} ~ {self.similar_id} ({self.score:.2f})"
+
+
+class ProductSalesDaily(models.Model):
+    """
+    Units sold per product per day; the rollup ProductPopularity is
+    recomputed from (see products.popularity)
+    """
+    product = models.ForeignKey(
+        Product,
+        related_name="daily_sales",
+        on_delete=models.CASCADE
+    )
+    day = models.DateField()
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "product_sales_daily"
+        unique_together = ("product", "day")
+        indexes = [
+            models.Index(fields=["day"], name="product_sales_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.day}: {self.quantity}"
+
+
+class ProductPopularity(models.Model):
+    """
+    Sliding-window best-seller counters backing sort=popular and the
+    homepage trending rail
+    """
+    product = models.OneToOneField(
+        Product,
+        primary_key=True,
+        related_name="popularity",
+        on_delete=models.CASCADE
+    )
+    sold_7d = models.IntegerField(default=0)
+    sold_30d = models.IntegerField(default=0)
+    score = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "product_popularity"
+        indexes = [
+            models.Index(fields=["-score", "-product"], name="product_popularity_score_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.score}"
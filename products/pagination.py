@@ -0,0 +1,158 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# =============================================================
+# KEYSET (CURSOR) PAGINATION
+# =============================================================
+class KeysetPagination:
+    """
+    Seek-method pagination over an explicit ordering.
+
+    The cursor is an opaque token holding the ordering values of the
+    last row on the page, so the next page is fetched with a
+    `WHERE (sort_key, id) > (last_sort_key, last_id)` style filter
+    instead of an OFFSET. Page 500 costs the same as page 1 as long as
+    the ordering is backed by an index.
+
+    The ordering must end on a unique column (normally "id" / "-id"),
+    otherwise rows sharing a sort value could be skipped.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def __init__(self, ordering, page_size=None, max_page_size=None):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size or settings.CATALOG_PAGE_SIZE
+        self.max_page_size = max_page_size or settings.CATALOG_MAX_PAGE_SIZE
+        self.next_cursor = None
+        self.request = None
+
+    # ---------------------------------------------------------
+    # CURSOR ENCODING
+    # ---------------------------------------------------------
+    def encode_cursor(self, values):
+        """
+        The ordering travels with the values, so a cursor from one sort
+        cannot be replayed against another
+        """
+        raw = json.dumps(
+            {"ordering": self.ordering, "values": values},
+            default=str,
+            separators=(",", ":")
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, token, queryset):
+        """
+        Returns the cursor values converted to their ordering fields'
+        Python types. Raises ValueError on anything else.
+        """
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            ordering, values = cursor["ordering"], cursor["values"]
+        except (ValueError, TypeError, KeyError):
+            raise ValueError("Invalid cursor")
+
+        if ordering != list(self.ordering) or not isinstance(values, list):
+            raise ValueError("Invalid cursor")
+        if len(values) != len(self.ordering) or None in values:
+            raise ValueError("Invalid cursor")
+
+        try:
+            return [
+                self.ordering_field(queryset, field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def ordering_field(queryset, field):
+        name = field.lstrip("-")
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return queryset.model._meta.get_field(name)
+
+    # ---------------------------------------------------------
+    # QUERY HELPERS
+    # ---------------------------------------------------------
+    def get_page_size(self, request):
+        try:
+            size = int(request.GET.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def seek_filter(self, values):
+        """
+        Build `(a, b) > (x, y)` for mixed sort directions:
+        a > x OR (a = x AND b > y) ...
+        """
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+
+            step = Q(**{f"{name}__{lookup}": values[position]})
+            for prev_field, prev_value in zip(self.ordering[:position], values):
+                step &= Q(**{prev_field.lstrip("-"): prev_value})
+            condition |= step
+        return condition
+
+    def row_values(self, row):
+        names = [field.lstrip("-") for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    # ---------------------------------------------------------
+    # PUBLIC API (mirrors DRF paginators)
+    # ---------------------------------------------------------
+    def paginate_queryset(self, queryset, request):
+        """
+        Raises ValueError on a malformed cursor; views turn that into 400.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+
+        token = request.GET.get(self.cursor_query_param)
+        if token:
+            values = self.decode_cursor(token, queryset)
+            queryset = queryset.filter(self.seek_filter(values))
+
+        # Fetch one extra row to know whether a next page exists
+        rows = list(queryset[:page_size + 1])
+
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_cursor = self.encode_cursor(self.row_values(rows[-1]))
+
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "cursor": self.next_cursor,
+                "results": data,
+            },
+            status=200
+        )
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .cache import invalidate_home_payload
+from .models import Product, ProductPopularity, ProductSalesDaily
+
+
+# Counter column -> window length in days
+POPULARITY_WINDOWS = {"sold_7d": 7, "sold_30d": 30}
+
+# score = 3 x last week + last month, so fresh sellers rise faster
+SCORE_WEIGHTS = {"sold_7d": 3, "sold_30d": 1}
+
+TRENDING_LIMIT = 12
+
+# Product.popularity_score mirrors ProductPopularity.score (0 when absent),
+# so this ordering is served by product_popularity_id_idx
+POPULAR_SORT = ("-popularity_score", "-id")
+
+
+def per_product_case(amounts, field="product_id"):
+    return Case(
+        *[When(**{field: product_id}, then=Value(amount)) for product_id, amount in amounts.items()],
+        default=Value(0),
+        output_field=IntegerField()
+    )
+
+
+def sync_product_scores():
+    """
+    Copy every score onto Product.popularity_score: one correlated UPDATE
+    for products with a popularity row, one reset for those without.
+    """
+    scores = ProductPopularity.objects.filter(product_id=OuterRef("pk")).values("score")[:1]
+    ranked = ProductPopularity.objects.values("product_id")
+
+    Product.objects.filter(pk__in=ranked).update(popularity_score=Subquery(scores))
+    Product.objects.exclude(pk__in=ranked).exclude(popularity_score=0).update(popularity_score=0)
+
+
+# =============================================================
+# INCREMENTAL UPDATES (checkout / cancellation)
+# =============================================================
+def record_sales(lines, day=None, sign=1):
+    """
+    Add (sign=1) or take back (sign=-1) units sold on `day`.
+
+    lines: [(product_id, quantity), ...]
+    Touches only the affected rows: two INSERT .. ON CONFLICT DO NOTHING
+    to make sure the rows exist, then one UPDATE each with per-product
+    CASE increments, so concurrent checkouts never read-modify-write.
+    """
+    totals = defaultdict(int)
+    for product_id, quantity in lines:
+        totals[product_id] += sign * quantity
+    if not totals:
+        return
+
+    today = timezone.localdate()
+    day = day or today
+    age = (today - day).days
+    delta = per_product_case(totals)
+
+    with transaction.atomic():
+        ProductSalesDaily.objects.bulk_create(
+            [ProductSalesDaily(product_id=product_id, day=day) for product_id in totals],
+            ignore_conflicts=True
+        )
+        ProductSalesDaily.objects.filter(day=day, product_id__in=totals).update(
+            quantity=F("quantity") + delta
+        )
+
+        # Only windows that still contain `day` move
+        windows = [name for name, days in POPULARITY_WINDOWS.items() if 0 <= age < days]
+        if not windows:
+            return
+
+        ProductPopularity.objects.bulk_create(
+            [ProductPopularity(product_id=product_id) for product_id in totals],
+            ignore_conflicts=True
+        )
+        weight = sum(SCORE_WEIGHTS[name] for name in windows)
+        changes = {name: F(name) + delta for name in windows}
+        ProductPopularity.objects.filter(product_id__in=totals).update(
+            score=F("score") + delta * weight,
+            **changes
+        )
+        Product.objects.filter(pk__in=totals).update(
+            popularity_score=F("popularity_score") + per_product_case(totals, "pk") * weight
+        )
+        # The home page ranks by popularity_score; a .update() sends no signal
+        transaction.on_commit(invalidate_home_payload)
+
+
+# =============================================================
+# WINDOW SLIDE (scheduled)
+# =============================================================
+def refresh_popularity():
+    """
+    Re-derive the window counters from the daily buckets, so sales that
+    slid out of a window drop off. Reads at most 30 buckets per product;
+    order history is never rescanned. Buckets older than the widest
+    window are pruned.
+    """
+    today = timezone.localdate()
+    oldest = today - timedelta(days=max(POPULARITY_WINDOWS.values()) - 1)
+
+    sums = {
+        name: Coalesce(
+            Sum("quantity", filter=Q(day__gte=today - timedelta(days=days - 1))),
+            Value(0)
+        )
+        for name, days in POPULARITY_WINDOWS.items()
+    }
+    rows = (
+        ProductSalesDaily.objects.filter(day__gte=oldest)
+        .values("product_id")
+        .annotate(**sums)
+    )
+
+    records = []
+    for row in rows:
+        counters = {name: max(0, row[name]) for name in POPULARITY_WINDOWS}
+        score = sum(SCORE_WEIGHTS[name] * value for name, value in counters.items())
+        records.append(
+            ProductPopularity(product_id=row["product_id"], score=score, **counters)
+        )
+
+    with transaction.atomic():
+        ProductPopularity.objects.exclude(
+            product_id__in=ProductSalesDaily.objects.filter(day__gte=oldest).values("product_id")
+        ).delete()
+        ProductPopularity.objects.bulk_create(
+            records,
+            update_conflicts=True,
+            unique_fields=["product"],
+            update_fields=[*POPULARITY_WINDOWS, "score", "updated_at"]
+        )
+        sync_product_scores()
+        ProductSalesDaily.objects.filter(day__lt=oldest).delete()
+
+    invalidate_home_payload()
+    return len(records)
+
+
+def backfill_daily_sales():
+    """
+    One-off seed of the daily buckets from OrderItem for the widest window
+    (for deployments that already have orders).
+    """
+    from orders.models import OrderItem
+
+    today = timezone.localdate()
+    oldest = today - timedelta(days=max(POPULARITY_WINDOWS.values()) - 1)
+
+    rows = (
+        OrderItem.objects.filter(order__created_at__date__gte=oldest)
+        .exclude(order__status="CANCELLED")
+        .annotate(day=TruncDate("order__created_at"))
+        .values("product_id", "day")
+        .annotate(units=Sum("quantity"))
+    )
+    ProductSalesDaily.objects.bulk_create(
+        [
+            ProductSalesDaily(product_id=row["product_id"], day=row["day"], quantity=row["units"])
+            for row in rows
+        ],
+        update_conflicts=True,
+        unique_fields=["product", "day"],
+        update_fields=["quantity"]
+    )
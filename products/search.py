@@ -0,0 +1,91 @@
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+)
+from django.db import connections
+from django.db.models import Case, F, OuterRef, Q, Subquery, Value, When
+
+
+SEARCH_CONFIG = "english"
+
+# Columns that feed Product.search_vector; saving any of them re-indexes the row
+SEARCH_FIELDS = {"name", "category", "fabric", "occasion", "description"}
+
+# Weights used by the portable (non-PostgreSQL) fallback ranking
+FALLBACK_WEIGHTS = (
+    ("name", 1.0),
+    ("category__name", 0.4),
+    ("fabric", 0.2),
+    ("occasion", 0.2),
+    ("description", 0.1),
+)
+
+
+def is_postgres(queryset):
+    return connections[queryset.db].vendor == "postgresql"
+
+
+# =============================================================
+# INDEX MAINTENANCE
+# =============================================================
+def build_search_vector():
+    """
+    Weighted tsvector: name (A) > category (B) > fabric/occasion (C) > description (D)
+    The category name is pulled with a correlated subquery because
+    UPDATE ... SET cannot reference joined columns.
+    """
+    from .models import Category
+
+    category_name = Subquery(
+        Category.objects.filter(pk=OuterRef("category_id")).values("name")[:1]
+    )
+    return (
+        SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(category_name, weight="B", config=SEARCH_CONFIG)
+        + SearchVector("fabric", "occasion", weight="C", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="D", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(queryset):
+    """
+    Recompute the stored tsvector for the given rows in one UPDATE.
+    No-op on databases without full-text search (SQLite in tests).
+    """
+    if is_postgres(queryset):
+        queryset.update(search_vector=build_search_vector())
+
+
+# =============================================================
+# QUERYING
+# =============================================================
+def search_products(queryset, term):
+    """
+    Filter + annotate `search_rank` (higher is better).
+
+    PostgreSQL: GIN-indexed tsvector match OR trigram similarity on name
+    (typo tolerant), ranked by ts_rank + similarity.
+    Others: per-word icontains across the same columns with a weighted score.
+    """
+    term = term.strip()
+
+    if is_postgres(queryset):
+        query = SearchQuery(term, config=SEARCH_CONFIG, search_type="websearch")
+        return queryset.annotate(
+            search_rank=SearchRank(F("search_vector"), query)
+            + TrigramSimilarity("name", term)
+        ).filter(
+            Q(search_vector=query) | Q(name__trigram_similar=term)
+        )
+
+    condition = Q()
+    rank = Value(0.0)
+    for word in term.split():
+        for field, weight in FALLBACK_WEIGHTS:
+            match = Q(**{f"{field}__icontains": word})
+            condition |= match
+            rank = rank + Case(
+                When(match, then=Value(weight)),
+                default=Value(0.0),
+            )
+
+    return queryset.annotate(search_rank=rank).filter(condition)
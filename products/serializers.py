@@ -1,5 +1,7 @@
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
 from rest_framework import serializers
-from .models import Carousel, Product, ProductImage, Banner
+from .models import Carousel, Category, Product, ProductImage, Banner
 
 
 # =============================================================
@@ -10,16 +12,94 @@ class CarouselSerializer(serializers.ModelSerializer):
     For homepage slider (desktop + mobile images).
     Simple serializer, no heavy logic needed yet.
     """
+    srcset = serializers.JSONField(source="image_variants", read_only=True)
 
     class Meta:
         model = Carousel
-        fields = "__all__"
+        exclude = ["image_variants"]
+
+
+def calculate_discounted_price(obj):
+    # Computed by the database (Product.effective_price)
+    return obj.effective_price
+
+
+# =============================================================
+# CATEGORY
+# =============================================================
+class CategoryField(serializers.RelatedField):
+    """
+    Products read/write their category by NAME (API stays string based).
+    Validation only looks the category up (by slug, then by exact name);
+    an unknown name comes back as an UNSAVED Category that save_category()
+    creates once the product is actually written, so a rejected product
+    never leaves a category behind.
+    An optional `category_cache` dict in the context is reused across rows
+    (bulk import) to avoid one query per row.
+    """
+
+    default_error_messages = {
+        "blank": "Category is required",
+    }
+
+    def to_representation(self, value):
+        return value.name
+
+    def to_internal_value(self, data):
+        name = str(data).strip()
+        slug = slugify(name)
+        if not slug:
+            self.fail("blank")
+
+        cache = self.context.get("category_cache")
+        if cache is not None and slug in cache:
+            return cache[slug]
+
+        category = (
+            Category.objects.filter(slug=slug).first()
+            or Category.objects.filter(name=name).first()
+            or Category(name=name, slug=slug)
+        )
+        if cache is not None:
+            cache[slug] = category
+        return category
+
+
+def save_category(category):
+    """
+    Create a category CategoryField returned unsaved; saved ones pass
+    through. A name or slug claimed concurrently is reported as a
+    validation error instead of an IntegrityError.
+    """
+    if category.pk is not None:
+        return category
+
+    try:
+        with transaction.atomic():
+            saved, _ = Category.objects.get_or_create(
+                slug=category.slug, defaults={"name": category.name}
+            )
+    except IntegrityError:
+        raise serializers.ValidationError(
+            {"category": [f'A category named "{category.name}" already exists']}
+        )
+    return saved
+
+
+class CategorySerializer(serializers.ModelSerializer):
+    product_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Category
+        fields = ["id", "name", "slug", "product_count"]
 
 
 class ProductImageSerializer(serializers.ModelSerializer):
+    srcset = serializers.JSONField(source="image_variants", read_only=True)
+
     class Meta:
         model = ProductImage
-        fields = ["id", "image_url"]
+        fields = ["id", "image_url", "srcset"]
 
 
 # =============================================================
@@ -35,20 +115,33 @@ class ProductSerializer(serializers.ModelSerializer):
     # Auto-calculated price after discount (Optional UI improvement)
     discounted_price = serializers.SerializerMethodField(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
+    category = CategoryField(queryset=Category.objects.all())
+    # Width-bucketed variant URLs per image field (see products.images)
+    srcset = serializers.JSONField(source="image_variants", read_only=True)
+
     class Meta:
         model = Product
-        fields = "__all__"
+        exclude = ["search_vector", "effective_price", "image_variants", "popularity_score"]
         read_only_fields = ["slug", "created_at"]  # user should not update these
 
     # ---------------------------------------------------------
     # CALCULATE EFFECTIVE PRICE IF NEEDED (UI Booster)
     # ---------------------------------------------------------
     def get_discounted_price(self, obj):
-        try:
-            # Example: price after discount use for frontend
-            return obj.mrp - (obj.mrp * obj.discount / 100)
-        except:
-            return obj.price    # fallback safety
+        return calculate_discounted_price(obj)
+
+    # ---------------------------------------------------------
+    # WRITES (a new category is only created with its product)
+    # ---------------------------------------------------------
+    def create(self, validated_data):
+        if "category" in validated_data:
+            validated_data["category"] = save_category(validated_data["category"])
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        if "category" in validated_data:
+            validated_data["category"] = save_category(validated_data["category"])
+        return super().update(instance, validated_data)
 
     # ---------------------------------------------------------
     # VALIDATION (Improves data quality)
@@ -72,6 +165,95 @@ class ProductSerializer(serializers.ModelSerializer):
 
 
 
+# =============================================================
+# PRODUCT LIST SERIALIZER (Grid cards / cart rows)
+# =============================================================
+class ProductListSerializer(serializers.ModelSerializer):
+    """
+    Compact product card: no description, no gallery (no images query).
+    Supports sparse fieldsets via `fields=[...]`; pair it with
+    `queryset.only(*ProductListSerializer.model_columns(fields))`
+    so the ORM never loads the dropped columns either.
+    """
+
+    discounted_price = serializers.SerializerMethodField(read_only=True)
+    category = serializers.CharField(source="category.name", read_only=True)
+    srcset = serializers.JSONField(source="image_variants", read_only=True)
+
+    # Model columns read by computed / related output fields
+    SOURCE_COLUMNS = {
+        "discounted_price": ("effective_price",),
+        "category": ("category", "category__name"),
+        "srcset": ("image_variants",),
+    }
+
+    class Meta:
+        model = Product
+        fields = [
+            "id",
+            "name",
+            "slug",
+            "category",
+            "price",
+            "mrp",
+            "discount",
+            "discounted_price",
+            "rating",
+            "main_image",
+            "hover_image",
+            "srcset",
+        ]
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_discounted_price(self, obj):
+        return calculate_discounted_price(obj)
+
+    # ---------------------------------------------------------
+    # SPARSE FIELDSET HELPERS
+    # ---------------------------------------------------------
+    @classmethod
+    def parse_fields(cls, raw):
+        """
+        "name,price,bogus" -> ["name", "price"]; None when nothing usable
+        """
+        if not raw:
+            return None
+        requested = [name.strip() for name in raw.split(",")]
+        fields = [name for name in requested if name in cls.Meta.fields]
+        return fields or None
+
+    @classmethod
+    def model_columns(cls, fields=None, extra=()):
+        """
+        Columns needed to render `fields` (all when None), plus any `extra`
+        names that are real columns (e.g. keyset ordering).
+        """
+        concrete = {field.name for field in Product._meta.concrete_fields}
+        columns = {"id"}
+        for name in list(fields or cls.Meta.fields) + list(extra):
+            name = name.lstrip("-")
+            columns.update(cls.SOURCE_COLUMNS.get(name, (name,)))
+        return sorted(
+            column for column in columns
+            if column in concrete or "__" in column
+        )
+
+    @classmethod
+    def optimize(cls, queryset, fields=None, extra=()):
+        """
+        Load only what the response needs (JOIN category only when rendered)
+        """
+        columns = cls.model_columns(fields, extra)
+        if "category__name" in columns:
+            queryset = queryset.select_related("category")
+        return queryset.only(*columns)
+
+
 # =============================================================
 # BANNER SERIALIZER (Homepage Wide Banner)
 # =============================================================
@@ -79,6 +261,8 @@ class BannerSerializer(serializers.ModelSerializer):
     """
     Used for homepage promotional banner images + category mapping
     """
+    srcset = serializers.JSONField(source="image_variants", read_only=True)
+
     class Meta:
         model = Banner
-        fields = "__all__"
+        exclude = ["image_variants"]
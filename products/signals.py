@@ -0,0 +1,62 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .autocomplete import index_product, invalidate_suggestions, unindex_product
+from .cache import (
+    bump_catalog_version, invalidate_home_payload, invalidate_product_detail
+)
+from .models import Banner, Carousel, Category, Product, ProductImage
+from .search import update_search_vector
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Banner)
+@receiver([post_save, post_delete], sender=Carousel)
+def drop_home_payload(sender, instance, **kwargs):
+    invalidate_home_payload()
+
+
+@receiver([post_save, post_delete], sender=Product)
+def drop_product_detail(sender, instance, **kwargs):
+    invalidate_product_detail(instance.slug)
+    bump_catalog_version()
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+def drop_product_detail_for_gallery(sender, instance, **kwargs):
+    slug = (
+        Product.objects.filter(pk=instance.product_id)
+        .values_list("slug", flat=True)
+        .first()
+    )
+    invalidate_product_detail(slug)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def refresh_category_products(sender, instance, **kwargs):
+    # A rename changes every product's payload and search text
+    products = Product.objects.filter(category_id=instance.pk)
+    update_search_vector(products)
+    for slug in products.values_list("slug", flat=True):
+        invalidate_product_detail(slug)
+
+    invalidate_home_payload()
+    bump_catalog_version()
+    invalidate_suggestions()
+
+
+@receiver(post_save, sender=Product)
+def add_to_suggestions(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {"name", "slug"}.intersection(update_fields):
+        return
+
+    # A price/stock edit leaves the label alone: nothing to announce
+    label = instance.suggest_label()
+    if created or label != getattr(instance, "_loaded_label", None):
+        index_product(instance)
+        instance._loaded_label = label
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_suggestions(sender, instance, **kwargs):
+    unindex_product(instance.pk)
@@ -0,0 +1,127 @@
+import math
+
+from django.db import transaction
+
+from .models import Product, ProductSimilarity
+
+
+SIMILAR_TOP_K = 12
+
+# Relative importance of each attribute in the similarity score
+FEATURE_WEIGHTS = {
+    "category": 3.0,
+    "fabric": 2.0,
+    "occasion": 1.5,
+    "comfort": 1.0,
+    "price": 1.5,
+}
+
+# Price is encoded as soft membership of log-spaced centres, so nearby
+# prices overlap and very different prices do not
+PRICE_CENTRES = [math.log(price) for price in (300, 600, 1200, 2500, 5000, 10000, 20000)]
+PRICE_SIGMA = 0.5
+
+
+def load_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("numpy is required to build product similarities")
+    return numpy
+
+
+# =============================================================
+# FEATURES
+# =============================================================
+def build_feature_matrix(rows, np):
+    """
+    rows: [{"id", "category_id", "fabric", "occasion", "comfort", "effective_price"}]
+    Returns an (n, d) float32 matrix of L2-normalised feature vectors,
+    so cosine similarity is a plain dot product.
+    """
+    vocab = {}
+    for attr in ("category", "fabric", "occasion", "comfort"):
+        source = "category_id" if attr == "category" else attr
+        for row in rows:
+            value = str(row[source] or "").strip().lower()
+            if value:
+                vocab.setdefault((attr, value), len(vocab))
+
+    matrix = np.zeros((len(rows), len(vocab) + len(PRICE_CENTRES)), dtype=np.float32)
+
+    for i, row in enumerate(rows):
+        for attr in ("category", "fabric", "occasion", "comfort"):
+            source = "category_id" if attr == "category" else attr
+            value = str(row[source] or "").strip().lower()
+            if value:
+                matrix[i, vocab[(attr, value)]] = FEATURE_WEIGHTS[attr]
+
+    prices = np.array([max(row["effective_price"] or 1, 1) for row in rows], dtype=np.float32)
+    distance = np.log(prices)[:, None] - np.array(PRICE_CENTRES, dtype=np.float32)[None, :]
+    matrix[:, len(vocab):] = FEATURE_WEIGHTS["price"] * np.exp(-(distance ** 2) / (2 * PRICE_SIGMA ** 2))
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def top_k_neighbours(matrix, k, batch_size, np):
+    """
+    Yields (row_index, [(neighbour_index, score), ...]) best first,
+    computing similarities one batch of rows at a time to bound memory.
+    """
+    n = matrix.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return
+
+    for start in range(0, n, batch_size):
+        scores = matrix[start:start + batch_size] @ matrix.T
+        rows = np.arange(scores.shape[0])
+        scores[rows, rows + start] = -np.inf          # never recommend itself
+
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        picked = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-picked, axis=1)
+
+        for offset in rows:
+            best = candidates[offset][order[offset]]
+            yield start + offset, [(int(j), float(scores[offset, j])) for j in best]
+
+
+# =============================================================
+# BUILD
+# =============================================================
+def rebuild_similarities(top_k=SIMILAR_TOP_K, batch_size=256):
+    """
+    Recompute the whole ProductSimilarity table. Returns the row count.
+    """
+    np = load_numpy()
+
+    rows = list(
+        Product.objects.order_by("id").values(
+            "id", "category_id", "fabric", "occasion", "comfort", "effective_price"
+        )
+    )
+    if not rows:
+        return 0
+
+    matrix = build_feature_matrix(rows, np)
+    ids = [row["id"] for row in rows]
+
+    links = [
+        ProductSimilarity(
+            product_id=ids[i],
+            similar_id=ids[j],
+            score=round(score, 4),
+            rank=rank
+        )
+        for i, neighbours in top_k_neighbours(matrix, top_k, batch_size, np)
+        for rank, (j, score) in enumerate(neighbours, start=1)
+    ]
+
+    with transaction.atomic():
+        ProductSimilarity.objects.all().delete()
+        ProductSimilarity.objects.bulk_create(links, batch_size=2000)
+
+    return len(links)
@@ -1,3 +1,947 @@
-from django.test import TestCase
+import csv
+import importlib.util
+import io
+import json
+import re
+import unittest
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from reviews.models import Review
+from users.models import OTP, User
+
+from .autocomplete import PrefixIndex, shared_state, suggest
+from .bulk import PRODUCT_COLUMNS, ProductImporter
+from .cache import (
+    PRODUCT_DETAIL_TIMEOUT, catalog_version, get_home_payload, invalidate_product_detail,
+    product_detail_lru, product_detail_stats, product_detail_version, set_home_payload
+)
+from .models import (
+    Banner, Category, Product, ProductImage, ProductPopularity, ProductSalesDaily,
+    ProductSimilarity
+)
+from .pagination import KeysetPagination
+from .popularity import POPULAR_SORT, record_sales, refresh_popularity
+from .search import search_products, update_search_vector
+from .serializers import ProductListSerializer, ProductSerializer, save_category
+from .similarity import build_feature_matrix, load_numpy, rebuild_similarities, top_k_neighbours
+
+
+SEED_ROWS = 5000
+
+
+def make_product(name="Saree", category=None, **kwargs):
+    if category is None:
+        category, _ = Category.objects.get_or_create(name="Sarees", slug="sarees")
+    kwargs.setdefault("mrp", 1000)
+    kwargs.setdefault("price", 900)
+    return Product.objects.create(name=name, category=category, **kwargs)
+
+
+# =============================================================
+# KEYSET PAGINATION
+# =============================================================
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Repeated prices: ties must be broken by id, never skipped or repeated
+        cls.products = [make_product(f"Saree {i}", price=500 + (i % 3) * 100) for i in range(10)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def walk(self, params):
+        ids, url = [], "/api/products/admin/"
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.data["results"]]
+            url, params = response.data["next"], None
+        return ids
+
+    def test_pages_cover_every_row_once_in_order(self):
+        ids = self.walk({"page_size": 3, "sort": "price_low"})
+        expected = sorted(self.products, key=lambda product: (product.price, product.id))
+        self.assertEqual(ids, [product.id for product in expected])
+
+    def test_descending_mixed_ordering(self):
+        ids = self.walk({"page_size": 4, "sort": "price_high"})
+        expected = sorted(self.products, key=lambda product: (-product.price, -product.id))
+        self.assertEqual(ids, [product.id for product in expected])
+
+    def test_page_size_is_capped(self):
+        paginator = KeysetPagination(("-id",), page_size=2, max_page_size=5)
+        request = RequestFactory().get("/", {"page_size": 500})
+        self.assertEqual(paginator.get_page_size(request), 5)
+
+    def test_last_page_has_no_cursor(self):
+        response = self.client.get("/api/products/admin/", {"page_size": 10})
+        self.assertIsNone(response.data["next"])
+        self.assertIsNone(response.data["cursor"])
+
+    def test_invalid_cursor_is_400(self):
+        response = self.client.get("/api/products/admin/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_for_another_ordering_is_400(self):
+        token = KeysetPagination(("-id",)).encode_cursor([1])
+        response = self.client.get("/api/products/admin/", {"cursor": token, "sort": "price_low"})
+        self.assertEqual(response.status_code, 400)
+
+        # Same length, different columns
+        token = KeysetPagination(("-discount", "-id")).encode_cursor([10, 1])
+        response = self.client.get("/api/products/admin/", {"cursor": token, "sort": "price_high"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_values_of_the_wrong_type_are_400(self):
+        paginator = KeysetPagination(("price", "id"))
+        for values in (["abc", 1], [{"a": 1}, 1], [[1], 1], [None, 1], [500, "x"]):
+            with self.subTest(values=values):
+                response = self.client.get(
+                    "/api/products/admin/",
+                    {"cursor": paginator.encode_cursor(values), "sort": "price_low"}
+                )
+                self.assertEqual(response.status_code, 400)
+
+
+# =============================================================
+# HOME PAGE
+# =============================================================
+class HomePayloadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.saree = make_product("Banarasi Saree", top_picks=True)
+        Banner.objects.create(name="Sarees", category="Sarees", banner_image="https://cdn.example.com/b.jpg")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def home(self):
+        response = self.client.get("/api/products/home/")
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_warm_hit_sends_no_query(self):
+        cold = self.home()
+        with self.assertNumQueries(0):
+            warm = self.home()
+        self.assertEqual(warm, cold)
+        self.assertEqual([row["slug"] for row in warm["top_picks"]], [self.saree.slug])
+
+    def test_cold_build_query_count_does_not_grow_with_banners(self):
+        with CaptureQueriesContext(connection) as one_banner:
+            self.home()
+
+        for name in ("Kurtas", "Lehenga", "Dupattas"):
+            category = Category.objects.create(name=name, slug=name.lower())
+            make_product(f"{name} 1", category=category)
+            Banner.objects.create(name=name, category=name, banner_image="https://cdn.example.com/b.jpg")
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as four_banners:
+            payload = self.home()
+        self.assertEqual(len(four_banners), len(one_banner))
+        self.assertEqual(len(payload["products_by_category"]), 4)
+
+    def test_product_save_drops_the_payload(self):
+        self.home()
+        product = Product.objects.get(pk=self.saree.pk)
+        product.top_picks = False
+        product.save()
+
+        self.assertEqual(self.home()["top_picks"], [])
+
+
+# =============================================================
+# PRODUCT DETAIL CACHE
+# =============================================================
+class ProductDetailCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.saree = make_product("Banarasi Saree")
+
+    def setUp(self):
+        cache.clear()
+        product_detail_lru.clear()
+        self.before = product_detail_stats.snapshot()
+        self.client = APIClient()
+
+    def counted(self):
+        now = product_detail_stats.snapshot()
+        return {name: now[name] - self.before[name] for name in now}
+
+    def detail(self, slug=None):
+        return self.client.get(f"/api/products/details/{slug or self.saree.slug}/")
+
+    def test_local_shared_and_database_tiers(self):
+        with self.assertNumQueries(2):
+            self.detail()                 # product + gallery
+        with self.assertNumQueries(0):
+            self.detail()                 # this worker's LRU
+        product_detail_lru.clear()        # a fresh worker
+        with self.assertNumQueries(0):
+            self.detail()
+
+        self.assertEqual(self.counted(), {"local_hits": 1, "shared_hits": 1, "misses": 1})
+
+    def test_stats_endpoint(self):
+        self.detail()
+        self.detail()
+        self.client.force_authenticate(User.objects.create_user("9000000034", is_staff=True))
+        response = self.client.get("/api/products/admin/cache-stats/")
+        self.assertEqual(response.data["local_size"], 1)
+        self.assertGreater(response.data["hit_ratio"], 0)
+
+    def test_save_rotates_the_version(self):
+        version = product_detail_version(self.saree.slug)
+        product = Product.objects.get(pk=self.saree.pk)
+        product.price = 750
+        product.save()
+        self.assertNotEqual(product_detail_version(self.saree.slug), version)
+
+    def test_write_on_another_worker_evicts_the_local_copy(self):
+        self.detail()
+        # Another worker saved the product: only the shared version moved
+        Product.objects.filter(pk=self.saree.pk).update(price=750)
+        invalidate_product_detail(self.saree.slug)
+
+        self.assertEqual(float(self.detail().data["price"]), 750)
+        self.assertEqual(self.counted()["misses"], 2)
+
+    def test_missing_products_are_not_cached_and_their_tokens_expire(self):
+        with mock.patch("products.cache.cache", wraps=cache) as shared:
+            self.assertEqual(self.detail("no-such-product").status_code, 404)
+            self.assertEqual(self.detail("no-such-product").status_code, 404)
+
+        self.assertEqual(self.counted()["misses"], 2)
+        self.assertTrue(shared.add.called)
+        for call in shared.add.call_args_list:
+            self.assertEqual(call.args[2], PRODUCT_DETAIL_TIMEOUT)
+        self.assertFalse(shared.set.called)
+
+
+# =============================================================
+# SEARCH
+# =============================================================
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        lehenga = Category.objects.create(name="Lehenga", slug="lehenga")
+        cls.by_name = make_product("Banarasi Silk Saree")
+        cls.by_description = make_product("Festive Drape", description="Pure banarasi weave")
+        cls.by_category = make_product("Bridal Red", category=lehenga)
+        cls.unrelated = make_product("Cotton Kurta", fabric="Cotton")
+
+    def search(self, term):
+        return list(
+            search_products(Product.objects.all(), term).order_by("-search_rank", "-id")
+        )
+
+    def test_name_match_ranks_first(self):
+        self.assertEqual(self.search("banarasi"), [self.by_name, self.by_description])
+
+    def test_searches_category_and_fabric(self):
+        self.assertEqual(self.search("lehenga"), [self.by_category])
+        self.assertEqual(self.search("cotton"), [self.unrelated])
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "trigram matching is PostgreSQL-only")
+    def test_typo_tolerance(self):
+        exact = make_product("Banarasi")
+        self.assertIn(exact, self.search("banarsi"))
+
+    def test_view_ranks_by_relevance(self):
+        cache.clear()
+        response = APIClient().get("/api/products/admin/", {"search": "banarasi"})
+        self.assertEqual(
+            [row["id"] for row in response.data["results"]],
+            [self.by_name.id, self.by_description.id]
+        )
+
+
+# =============================================================
+# LIST SERIALIZER / SPARSE FIELDSETS
+# =============================================================
+class ProductListPayloadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(20):
+            product = make_product(
+                f"Saree {i}",
+                description="Handwoven silk with zari border. " * 20,
+                main_image=f"https://cdn.example.com/{i}.jpg",
+            )
+            ProductImage.objects.bulk_create(
+                ProductImage(product=product, image_url=f"https://cdn.example.com/{i}-{n}.jpg")
+                for n in range(4)
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_list_payload_is_a_fraction_of_the_full_one(self):
+        products = Product.objects.order_by("-id")
+        full = json.dumps(ProductSerializer(products, many=True).data, default=str)
+        compact = json.dumps(
+            ProductListSerializer(ProductListSerializer.optimize(products), many=True).data,
+            default=str
+        )
+        self.assertLess(len(compact), len(full) / 3)
+
+    def test_listing_never_queries_the_gallery(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/products/admin/", {"page_size": 20})
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertFalse(any("product_images" in query["sql"] for query in queries))
+
+    def test_fields_projection_reaches_the_sql(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/products/admin/", {"fields": "id,name"})
+
+        self.assertEqual(set(response.data["results"][0]), {"id", "name"})
+        sql = queries.captured_queries[-1]["sql"]
+        self.assertIn('"name"', sql)
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('"category"', sql)
+
+    def test_unknown_fields_fall_back_to_the_card(self):
+        response = self.client.get("/api/products/admin/", {"fields": "bogus"})
+        self.assertEqual(
+            set(response.data["results"][0]), set(ProductListSerializer.Meta.fields)
+        )
+
+
+# =============================================================
+# TYPEAHEAD
+# =============================================================
+class SuggestTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.saree = make_product("Banarasi Silk Saree")
+
+    def setUp(self):
+        cache.clear()
+        # Another worker's copy of the index, built before the writes below
+        self.other_worker = PrefixIndex()
+        self.other_worker.rebuild(*shared_state())
+
+    def labels(self, index, prefix):
+        return [item["label"] for item in index.lookup(prefix, 8)]
+
+    def test_matches_any_word_prefix_categories_first(self):
+        self.assertEqual(
+            [item["label"] for item in suggest("sa")], ["Sarees", "Banarasi Silk Saree"]
+        )
+
+    def test_rename_is_replayed_without_a_rebuild(self):
+        product = Product.objects.get(pk=self.saree.pk)
+        product.name = "Kanjivaram Silk Saree"
+        product.save()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.other_worker.replay(*shared_state()))
+        self.assertEqual(self.labels(self.other_worker, "kanji"), ["Kanjivaram Silk Saree"])
+        self.assertEqual(self.labels(self.other_worker, "banarasi"), [])
+
+    def test_create_and_delete_are_replayed(self):
+        kurta = make_product("Cotton Kurta")
+        self.assertTrue(self.other_worker.replay(*shared_state()))
+        self.assertEqual(self.labels(self.other_worker, "cot"), ["Cotton Kurta"])
+
+        kurta.delete()
+        self.assertTrue(self.other_worker.replay(*shared_state()))
+        self.assertEqual(self.labels(self.other_worker, "cot"), [])
+
+    def test_edit_without_label_change_announces_nothing(self):
+        before = shared_state()
+        product = Product.objects.get(pk=self.saree.pk)
+        product.price = 750
+        product.save()
+        self.assertEqual(shared_state(), before)
+
+    def test_bulk_invalidation_forces_rebuild(self):
+        Category.objects.create(name="Kurtas", slug="kurtas")
+        self.assertFalse(self.other_worker.replay(*shared_state()))
+
+    def test_lost_changelog_forces_rebuild(self):
+        make_product("Cotton Kurta")
+        make_product("Linen Kurta")
+        version, seq = shared_state()
+        cache.delete(f"products:suggest:{version}:change:{seq}")
+        self.assertFalse(self.other_worker.replay(version, seq))
+
+
+# =============================================================
+# POPULARITY
+# =============================================================
+class PopularityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.never_sold, cls.steady, cls.hit = [
+            make_product(name) for name in ("Never sold", "Steady", "Hit")
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def scores(self):
+        return dict(Product.objects.values_list("id", "popularity_score"))
+
+    def test_sales_move_the_product_column_with_the_rollup(self):
+        record_sales([(self.hit.id, 5), (self.steady.id, 2)])
+        record_sales([(self.hit.id, 1)], sign=-1)
+
+        # this week counts 3x + this month 1x
+        expected = {self.never_sold.id: 0, self.steady.id: 8, self.hit.id: 16}
+        self.assertEqual(self.scores(), expected)
+        self.assertEqual(
+            dict(ProductPopularity.objects.values_list("product_id", "score")),
+            {self.steady.id: 8, self.hit.id: 16}
+        )
+
+    def test_sales_drop_the_home_payload_after_commit(self):
+        set_home_payload(b"{}")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            record_sales([(self.hit.id, 1)], day=timezone.localdate() - timedelta(days=40))
+        self.assertEqual(get_home_payload(), b"{}")
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            record_sales([(self.hit.id, 1)])
+            self.assertEqual(get_home_payload(), b"{}")
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNone(get_home_payload())
+
+    def test_refresh_drops_sales_that_left_the_window(self):
+        record_sales([(self.hit.id, 5)])
+        record_sales([(self.steady.id, 2)])
+        ProductSalesDaily.objects.filter(product=self.steady).update(
+            day=timezone.localdate() - timedelta(days=40)
+        )
+
+        refresh_popularity()
+        self.assertEqual(
+            self.scores(), {self.never_sold.id: 0, self.steady.id: 0, self.hit.id: 20}
+        )
+
+    def test_popular_sort_pages_through_every_product(self):
+        record_sales([(self.hit.id, 5), (self.steady.id, 2)])
+
+        client, ids, params = APIClient(), [], {"sort": "popular", "page_size": 1}
+        url = "/api/products/admin/"
+        while url:
+            response = client.get(url, params)
+            ids += [row["id"] for row in response.data["results"]]
+            url, params = response.data["next"], None
+
+        self.assertEqual(ids, [self.hit.id, self.steady.id, self.never_sold.id])
+
+    def test_trending_rail_only_lists_sellers(self):
+        record_sales([(self.steady.id, 1)])
+        payload = json.loads(APIClient().get("/api/products/home/").content)
+        self.assertEqual([row["slug"] for row in payload["trending"]], [self.steady.slug])
+
+
+# =============================================================
+# LISTING FILTERS / FACETS
+# =============================================================
+class SizeFilterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.small = make_product("Small", size="XS,S")
+        cls.spaced = make_product("Spaced", size="S, M")
+        cls.tiny = make_product("Tiny", size="XXS,XS")
+        cls.free = make_product("Free", size="Free Size")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_size_matches_whole_items_only(self):
+        response = self.client.get("/api/products/admin/", {"size": "s"})
+        self.assertEqual(
+            {row["id"] for row in response.data["results"]},
+            {self.small.id, self.spaced.id}
+        )
+
+    def test_size_value_is_escaped(self):
+        response = self.client.get("/api/products/admin/", {"size": "Free Size"})
+        self.assertEqual([row["id"] for row in response.data["results"]], [self.free.id])
+        response = self.client.get("/api/products/admin/", {"size": ".*"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_facet_counts_follow_the_filter(self):
+        response = self.client.get("/api/products/facets/", {"size": "XS"})
+        sizes = {item["value"]: item["count"] for item in response.data["facets"]["size"]}
+        self.assertEqual(response.data["total"], 2)
+        self.assertEqual(sizes, {"XS": 2, "S": 1, "XXS": 1})
+
+
+# =============================================================
+# SIMILAR PRODUCTS
+# =============================================================
+@unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is optional")
+class SimilarityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        lehenga = Category.objects.create(name="Lehenga", slug="lehenga")
+        cls.silk = make_product("Silk Saree", fabric="Silk", occasion="Wedding", price=900)
+        cls.silk_twin = make_product("Silk Saree II", fabric="Silk", occasion="Wedding", price=950)
+        cls.cotton = make_product("Cotton Saree", fabric="Cotton", occasion="Daily", price=400)
+        cls.lehenga = make_product(
+            "Bridal Lehenga", category=lehenga, fabric="Velvet", mrp=20000, price=18000
+        )
+
+    def setUp(self):
+        self.np = load_numpy()
+
+    def rows(self):
+        return list(
+            Product.objects.order_by("id").values(
+                "id", "category_id", "fabric", "occasion", "comfort", "effective_price"
+            )
+        )
+
+    def neighbours(self, matrix, k, batch_size=256):
+        return {
+            int(i): [(j, round(score, 4)) for j, score in picked]
+            for i, picked in top_k_neighbours(matrix, k, batch_size, self.np)
+        }
+
+    def test_feature_vectors_are_unit_length(self):
+        matrix = build_feature_matrix(self.rows(), self.np)
+        self.assertEqual(matrix.shape[0], 4)
+        self.assertTrue(self.np.allclose(self.np.linalg.norm(matrix, axis=1), 1))
+
+    def test_neighbours_exclude_the_product_and_are_best_first(self):
+        matrix = build_feature_matrix(self.rows(), self.np)
+        for i, picked in self.neighbours(matrix, 2).items():
+            self.assertNotIn(i, [j for j, _ in picked])
+            scores = [score for _, score in picked]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_k_at_or_above_n_returns_every_other_product(self):
+        matrix = build_feature_matrix(self.rows(), self.np)
+        for k in (3, 4, 50):
+            with self.subTest(k=k):
+                result = self.neighbours(matrix, k)
+                self.assertEqual(len(result), 4)
+                for i, picked in result.items():
+                    self.assertEqual(sorted(j for j, _ in picked), sorted(set(range(4)) - {i}))
+
+    def test_single_product_has_no_neighbours(self):
+        matrix = build_feature_matrix(self.rows()[:1], self.np)
+        self.assertEqual(self.neighbours(matrix, 5), {})
+
+    def test_batches_do_not_change_the_result(self):
+        matrix = build_feature_matrix(self.rows(), self.np)
+        self.assertEqual(self.neighbours(matrix, 2, batch_size=1), self.neighbours(matrix, 2))
+
+    def test_rebuild_and_similar_view(self):
+        ProductSimilarity.objects.create(product=self.silk, similar=self.lehenga, score=1, rank=1)
+
+        self.assertEqual(rebuild_similarities(top_k=2), 8)
+        response = APIClient().get(f"/api/products/similar/{self.silk.slug}/")
+        ids = [row["id"] for row in response.data]
+
+        # Same fabric and occasion first; the stale link is gone
+        self.assertEqual(ids[0], self.silk_twin.id)
+        self.assertEqual(len(ids), 2)
+        self.assertNotIn(self.silk.id, ids)
+
+    def test_unknown_slug_has_an_empty_rail(self):
+        response = APIClient().get("/api/products/similar/no-such-product/")
+        self.assertEqual((response.status_code, response.data), (200, []))
+
+
+# =============================================================
+# CATEGORY BY NAME
+# =============================================================
+class CategoryFieldTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("9000000035", is_staff=True)
+        # Renamed slug: the name no longer slugifies to it
+        cls.festive = Category.objects.create(name="Festive Wear", slug="festive")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def create(self, category, **fields):
+        data = {"name": "Saree", "mrp": 1000, "price": 900, "category": category, **fields}
+        return self.client.post("/api/products/admin/", data, format="multipart")
+
+    def test_new_category_is_created_with_the_product(self):
+        response = self.create("Kurtas")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Product.objects.get().category.slug, "kurtas")
+
+    def test_rejected_product_creates_no_category(self):
+        response = self.create("Kurtas", price=2000)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Category.objects.filter(slug="kurtas").exists())
+
+    def test_existing_name_under_another_slug_is_reused(self):
+        response = self.create("Festive Wear")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Product.objects.get().category, self.festive)
+        self.assertEqual(Category.objects.count(), 1)
+
+    def test_name_taken_meanwhile_is_a_validation_error(self):
+        # Validated before "Festive Wear" existed under this slug
+        with self.assertRaises(ValidationError) as raised:
+            save_category(Category(name="Festive Wear", slug="festive-wear"))
+        self.assertIn("category", raised.exception.detail)
+
+    def test_rejected_import_rows_create_no_category(self):
+        report = ProductImporter().run([
+            {"slug": "bad", "name": "Bad", "mrp": 100, "price": 900, "category": "Dupattas"},
+            {"slug": "good", "name": "Good", "mrp": 900, "price": 800, "category": "Stoles"},
+        ])
+        self.assertEqual((report["created"], report["failed"]), (1, 1))
+        self.assertEqual(
+            set(Category.objects.values_list("slug", flat=True)), {"festive", "stoles"}
+        )
+
+
+# =============================================================
+# BULK IMPORT / EXPORT
+# =============================================================
+def upload(name, content):
+    return SimpleUploadedFile(name, content.encode())
+
+
+class ProductImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("9000000031", is_staff=True)
+        cls.saree = make_product("Banarasi Saree", slug="banarasi", fabric="Silk", quantity=4)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def post(self, file):
+        return self.client.post("/api/products/admin/import/", {"file": file}, format="multipart")
+
+    def test_csv_creates_and_partially_updates_by_slug(self):
+        response = self.post(upload("products.csv", (
+            "slug,name,mrp,price,category,fabric\n"
+            "banarasi,,,850,,\n"
+            "kurta-1,Cotton Kurta,500,400,Kurtas,Cotton\n"
+        )))
+
+        self.assertEqual(response.data, {"created": 1, "updated": 1, "failed": 0, "errors": []})
+        saree = Product.objects.get(slug="banarasi")
+        # Blank cells leave the column alone
+        self.assertEqual((saree.price, saree.name, saree.fabric, saree.quantity), (850, "Banarasi Saree", "Silk", 4))
+        kurta = Product.objects.get(slug="kurta-1")
+        self.assertEqual((kurta.name, kurta.category.name), ("Cotton Kurta", "Kurtas"))
+
+    def test_duplicate_slug_in_a_batch_keeps_the_last_values(self):
+        response = self.post(upload("products.jsonl", "\n".join(json.dumps(row) for row in [
+            {"slug": "new-1", "name": "First", "mrp": 500, "price": 400, "category": "Sarees"},
+            {"slug": "new-1", "price": 300},
+            {"slug": "banarasi", "price": 800},
+            {"slug": "banarasi", "quantity": 9},
+        ])))
+
+        # Counted per product written, not per row
+        self.assertEqual((response.data["created"], response.data["updated"]), (1, 1))
+        self.assertEqual(Product.objects.get(slug="new-1").price, 300)
+        saree = Product.objects.get(slug="banarasi")
+        self.assertEqual((saree.price, saree.quantity), (800, 9))
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        response = self.post(upload("products.jsonl", "\n".join([
+            json.dumps({"slug": "ok", "name": "Fine", "mrp": 500, "price": 400, "category": "Sarees"}),
+            "{not json",
+            json.dumps(["a", "list"]),
+            json.dumps({"slug": "pricey", "name": "Pricey", "mrp": 100, "price": 400, "category": "Sarees"}),
+            json.dumps({"slug": "nameless", "mrp": 100, "price": 90, "category": "Sarees"}),
+        ])))
+
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 4))
+        self.assertEqual([error["row"] for error in response.data["errors"]], [2, 3, 4, 5])
+        self.assertEqual(response.data["errors"][0]["errors"], {"row": ["Invalid JSON line"]})
+        self.assertIn("name", response.data["errors"][3]["errors"])
+        self.assertFalse(Product.objects.filter(slug__in=["pricey", "nameless"]).exists())
+
+    def test_queries_per_batch_do_not_grow_with_rows(self):
+        def run(count, prefix):
+            rows = [
+                {"slug": f"{prefix}-{i}", "name": f"Product {i}", "mrp": 500, "price": 400,
+                 "category": f"Category {i % 3}"}
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                ProductImporter(batch_size=100).run(rows)
+            return len(queries)
+
+        run(3, "warm")  # creates the three categories
+        # Kept under SQLite's 999-parameter cap, which would split the INSERT
+        self.assertEqual(run(5, "small"), run(30, "large"))
+        self.assertEqual(Product.objects.filter(slug__startswith="large-").count(), 30)
+
+    def test_import_drops_cached_catalog_data(self):
+        self.client.get(f"/api/products/details/{self.saree.slug}/")
+        self.client.get("/api/products/home/")
+        versions = (product_detail_version(self.saree.slug), catalog_version(), shared_state())
+
+        self.post(upload("products.csv", "slug,price\nbanarasi,700\n"))
+
+        self.assertIsNone(get_home_payload())
+        after = (product_detail_version(self.saree.slug), catalog_version(), shared_state())
+        for before, now in zip(versions, after):
+            self.assertNotEqual(before, now)
+        response = self.client.get(f"/api/products/details/{self.saree.slug}/")
+        self.assertEqual(float(response.data["price"]), 700)
+
+    def test_rejects_other_file_types_and_non_admins(self):
+        self.assertEqual(self.post(upload("products.xlsx", "x")).status_code, 400)
+        self.client.force_authenticate(User.objects.create_user("9000000032"))
+        self.assertEqual(self.post(upload("products.csv", "slug\n")).status_code, 403)
+
+
+class ProductExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("9000000033", is_staff=True)
+        cls.products = [
+            make_product(f"Saree {i}", slug=f"saree-{i}", description='Zari, "gold" border')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, export_type):
+        response = self.client.get("/api/products/admin/export/", {"type": export_type})
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_round_trips_through_the_importer(self):
+        rows = list(csv.DictReader(io.StringIO(self.export("csv"))))
+
+        self.assertEqual(list(rows[0]), PRODUCT_COLUMNS)
+        self.assertEqual([row["slug"] for row in rows], ["saree-0", "saree-1", "saree-2"])
+        self.assertEqual(rows[0]["category"], "Sarees")
+        self.assertEqual(rows[0]["description"], 'Zari, "gold" border')
+
+        report = ProductImporter().run(rows)
+        self.assertEqual((report["updated"], report["failed"]), (3, 0))
+
+    def test_jsonl_has_one_object_per_product(self):
+        lines = self.export("jsonl").splitlines()
+        self.assertEqual(
+            [json.loads(line)["slug"] for line in lines], ["saree-0", "saree-1", "saree-2"]
+        )
+
+    def test_unknown_type_is_400(self):
+        response = self.client.get("/api/products/admin/export/", {"type": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+
+# =============================================================
+# EXPLAIN CHECKS (hot endpoint queries must use an index)
+# =============================================================
+def full_scan(plan, table):
+    """
+    True when the plan reads `table` without an index.
+    PostgreSQL: "Seq Scan on table"; SQLite: "SCAN table" (no USING INDEX).
+    """
+    if re.search(rf"Seq Scan on {re.escape(table)}\b", plan):
+        return True
+    return bool(
+        re.search(rf"\bSCAN {re.escape(table)}\b(?! USING (COVERING )?INDEX)", plan)
+    )
+
+
+postgres_only = unittest.skipUnless(
+    connection.vendor == "postgresql",
+    "index choice is only checked against PostgreSQL's planner"
+)
+
+
+class IndexScanMixin:
+    """
+    Tiny tables are cheaper to scan, so the planner only picks the indexes
+    once there is realistic data: tests seed SEED_ROWS rows and ANALYZE.
+    """
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}")
+            return "\n".join(str(row[-1]) for row in cursor.fetchall())
+
+    def assertIndexScan(self, queryset, table):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        plan = queryset.explain()
+        self.assertFalse(full_scan(plan, table), f"full scan on {table}:\n{plan}")
+
+    @contextmanager
+    def assertIndexedQueries(self, *tables):
+        """
+        EXPLAIN every SELECT the block sends for `tables`, exactly as the
+        view built it, so a view change that loses the index fails here.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            yield
+
+        explained = 0
+        for query in queries.captured_queries:
+            sql = query["sql"]
+            touched = [
+                table for table in tables
+                if re.search(rf'\b(FROM|JOIN) "{re.escape(table)}"', sql)
+            ]
+            if not touched or not sql.lstrip().upper().startswith("SELECT"):
+                continue
+
+            plan = self.explain(sql)
+            for table in touched:
+                self.assertFalse(full_scan(plan, table), f"full scan on {table}:\n{sql}\n{plan}")
+            explained += 1
+
+        self.assertTrue(explained, f"the endpoint sent no query on {tables}")
+
+
+@postgres_only
+class HotQueryIndexTests(IndexScanMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = Category.objects.bulk_create(
+            Category(name=f"Category {i}", slug=f"category-{i}") for i in range(20)
+        )
+        Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                slug=f"product-{i}",
+                mrp=1000,
+                price=900,
+                category=categories[i % len(categories)],
+                top_picks=(i % 50 == 0),
+                popularity_score=(i if i % 100 == 0 else 0),
+            )
+            for i in range(SEED_ROWS)
+        )
+        Banner.objects.create(
+            name="Festive", category=categories[0].name, banner_image="https://cdn.example.com/b.jpg"
+        )
+        cls.product = Product.objects.order_by("id").first()
+
+        users = User.objects.bulk_create(
+            User(mobile=f"9{i:09d}") for i in range(10)
+        )
+        products = list(Product.objects.order_by("id")[:SEED_ROWS // len(users)])
+        Review.objects.bulk_create(
+            Review(user=user, product=product, rating=4, ai_score=(product.id % 7) / 7)
+            for user in users
+            for product in products
+        )
+
+        OTP.objects.bulk_create(
+            OTP(mobile=f"8{i:09d}", code=f"{i % 1000000:06d}", is_used=(i % 2 == 0))
+            for i in range(SEED_ROWS)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_home(self):
+        # top picks, trending and the windowed category rail
+        with self.assertIndexedQueries("product"):
+            response = self.client.get("/api/products/home/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_list_newest(self):
+        with self.assertIndexedQueries("product"):
+            self.client.get("/api/products/admin/")
+
+    def test_product_list_popular(self):
+        with self.assertIndexedQueries("product"):
+            self.client.get("/api/products/admin/", {"sort": "popular"})
+
+    def test_product_list_price_page_two(self):
+        first = self.client.get("/api/products/admin/", {"sort": "price_low"})
+        with self.assertIndexedQueries("product"):
+            self.client.get(first.data["next"])
+
+    def test_product_reviews(self):
+        with self.assertIndexedQueries("reviews_review"):
+            self.client.get(f"/reviews/product/{self.product.id}/")
+
+    def test_otp_lookup(self):
+        with self.assertIndexedQueries("otp_codes"):
+            self.client.post(
+                "/api/auth/verify-otp/", {"mobile": "8000000001", "otp": "999999"}, format="json"
+            )
+
+
+@postgres_only
+class SearchScaleTests(IndexScanMixin, TestCase):
+    """
+    Search latency must not grow with the catalog: on a large catalog the
+    match has to come from the GIN indexes, never a scan of every product.
+    """
+
+    ROWS = 100_000
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Sarees", slug="sarees")
+        Product.objects.bulk_create(
+            (
+                Product(
+                    name=f"Product {i}",
+                    slug=f"product-{i}",
+                    mrp=1000,
+                    price=900,
+                    category=category,
+                    fabric=("Banarasi silk" if i % 1000 == 0 else "Cotton"),
+                )
+                for i in range(cls.ROWS)
+            ),
+            batch_size=5000
+        )
+        update_search_vector(Product.objects.all())
+
+    def test_full_text_match_uses_gin_index(self):
+        self.assertIndexScan(
+            search_products(Product.objects.all(), "banarasi")
+            .order_by("-search_rank", "-id")[:25],
+            "product"
+        )
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cloudinary.uploader
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def upload_to_cloudinary(file, folder):
+    upload = cloudinary.uploader.upload(file, folder=folder)
+    return upload.get("secure_url")
+
+
+def get_uploader():
+    """
+    The upload function is pluggable (settings.MEDIA_UPLOADER, dotted path)
+    so tests / local dev can swap Cloudinary for a stub: fn(file, folder) -> url
+    """
+    return import_string(settings.MEDIA_UPLOADER)
+
+
+def upload_file(file, folder):
+    return get_uploader()(file, folder)
+
+
+def upload_files(jobs):
+    """
+    Upload [(file, folder), ...] concurrently on a bounded thread pool.
+    Returns the URLs in the same order; the first failure is re-raised.
+    """
+    if not jobs:
+        return []
+
+    uploader = get_uploader()
+    workers = max(1, min(settings.MEDIA_UPLOAD_WORKERS, len(jobs)))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda job: uploader(*job), jobs))
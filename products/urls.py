@@ -1,13 +1,22 @@
 from django.urls import path
 from .views import (
     CarouselView, ProductView, BannerView, HomeView,
-    ProductDetailBySlug, ProductDetailByCategory
+    ProductDetailBySlug, ProductDetailByCategory, ProductDetailCacheStats,
+    FacetView, ProductImportView, ProductExportView, CategoryListView,
+    SimilarProductsView, SuggestView
 )
 urlpatterns = [
     path("home/", HomeView.as_view()),
     path("banners/", BannerView.as_view()),
     path("carousel/", CarouselView.as_view()),
+    path("suggest/", SuggestView.as_view()),
+    path("categories/", CategoryListView.as_view()),
+    path("facets/", FacetView.as_view()),
     path("category/<str:category>/", ProductDetailByCategory.as_view()),
     path("details/<slug:slug>/", ProductDetailBySlug.as_view()),
+    path("similar/<slug:slug>/", SimilarProductsView.as_view()),
     path("admin/", ProductView.as_view()),
+    path("admin/cache-stats/", ProductDetailCacheStats.as_view()),
+    path("admin/import/", ProductImportView.as_view()),
+    path("admin/export/", ProductExportView.as_view()),
 ]
@@ -3,17 +3,33 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import JSONRenderer
+from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
+from django.utils.text import slugify
 from django.views.decorators.csrf import csrf_exempt
-import cloudinary.uploader
 
-from .models import Carousel, Product, Banner, ProductImage
-from .serializers import CarouselSerializer, BannerSerializer, ProductSerializer
-
-
-def upload_to_cloudinary(file, folder):
-    upload = cloudinary.uploader.upload(file, folder=folder)
-    return upload.get("secure_url")
+from .models import Carousel, Category, Product, Banner, ProductImage
+from .serializers import (
+    CarouselSerializer, BannerSerializer, CategorySerializer,
+    ProductSerializer, ProductListSerializer
+)
+from .autocomplete import SUGGEST_LIMIT, suggest
+from .bulk import ProductImporter, iter_csv_rows, iter_jsonl_rows, stream_csv, stream_jsonl
+from .cache import (
+    get_home_payload, set_home_payload,
+    get_product_detail, product_detail_cache_stats,
+    get_facets, set_facets, invalidate_product_detail,
+    get_category_list, set_category_list
+)
+from .filters import FACET_FIELDS, compute_facets, filter_products
+from .pagination import KeysetPagination
+from .popularity import POPULAR_SORT, TRENDING_LIMIT
+from .search import search_products
+from .uploads import upload_file, upload_files
 
 
 # ===================== CAROUSEL =====================
@@ -29,11 +45,11 @@ class CarouselView(APIView):
         data = request.data.copy()
 
         if "desktop_image" in request.FILES:
-            data["desktop_image"] = upload_to_cloudinary(
+            data["desktop_image"] = upload_file(
                 request.FILES["desktop_image"], "carousel/desktop/"
             )
         if "mobile_image" in request.FILES:
-            data["mobile_image"] = upload_to_cloudinary(
+            data["mobile_image"] = upload_file(
                 request.FILES["mobile_image"], "carousel/mobile/"
             )
 
@@ -51,60 +67,110 @@ class CarouselView(APIView):
 
 
 # ===================== PRODUCT =====================
+# Keyset orderings per `sort` value; every one ends on a unique column
+# and is backed by a composite index on Product.
+PRODUCT_SORTS = {
+    "price_low": ("price", "id"),
+    "price_high": ("-price", "-id"),
+    "newest": ("-id",),
+    "discount_high": ("-discount", "-id"),
+    "popular": POPULAR_SORT,
+}
+DEFAULT_PRODUCT_SORT = ("-created_at", "-id")
+RELEVANCE_SORT = ("-search_rank", "-id")
+
+
 @method_decorator(csrf_exempt, name="dispatch")
 class ProductView(APIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def get(self, request):
-        products = Product.objects.all()
+        products = filter_products(Product.objects.all(), request.GET)
 
-        category = request.GET.get("category")
         search = request.GET.get("search")
         sort = request.GET.get("sort")
 
-        if category:
-            products = products.filter(category__icontains=category)
-        if search:
-            products = products.filter(name__icontains=search)
+        ordering = PRODUCT_SORTS.get(sort, DEFAULT_PRODUCT_SORT)
 
-        if sort == "price_low":
-            products = products.order_by("price")
-        elif sort == "price_high":
-            products = products.order_by("-price")
-        elif sort == "newest":
-            products = products.order_by("-id")
+        if search and search.strip():
+            products = search_products(products, search)
+            # Relevance first unless the client picked an explicit sort
+            if sort not in PRODUCT_SORTS:
+                ordering = RELEVANCE_SORT
 
-        return Response(ProductSerializer(products, many=True).data)
+        # Sparse fieldsets: only load the columns the response needs
+        fields = ProductListSerializer.parse_fields(request.GET.get("fields"))
+        products = ProductListSerializer.optimize(products, fields, extra=ordering)
+
+        paginator = KeysetPagination(ordering)
+        try:
+            page = paginator.paginate_queryset(products, request)
+        except ValueError:
+            return Response({"error": "Invalid cursor"}, status=400)
+
+        return paginator.get_paginated_response(
+            ProductListSerializer(page, many=True, fields=fields).data
+        )
 
     def post(self, request):
         self.permission_classes = [IsAdminUser]
         data = request.data.copy()
 
-        if "main_image" in request.FILES:
-            data["main_image"] = upload_to_cloudinary(
-                request.FILES["main_image"], "products/main/"
-            )
-
-        if "hover_image" in request.FILES:
-            data["hover_image"] = upload_to_cloudinary(
-                request.FILES["hover_image"], "products/hover/"
-            )
+        # 🔹 Validate BEFORE paying for any upload
+        image_fields = {
+            "main_image": "products/main/",
+            "hover_image": "products/hover/",
+        }
+        for field in image_fields:
+            if field in request.FILES:
+                data.pop(field, None)
+        data.pop("gallery_images", None)
 
         serializer = ProductSerializer(data=data)
-        if serializer.is_valid():
-            product = serializer.save()
-
-            # 🔹 Handle multiple gallery images
-            gallery_images = request.FILES.getlist("gallery_images")
-            for img in gallery_images:
-                url = upload_to_cloudinary(img, "products/gallery/")
-                ProductImage.objects.create(
-                    product=product,
-                    image_url=url
-                )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+
+        # 🔹 Upload main / hover / gallery images concurrently
+        jobs = [
+            (request.FILES[field], folder)
+            for field, folder in image_fields.items()
+            if field in request.FILES
+        ]
+        gallery_images = request.FILES.getlist("gallery_images")
+        jobs += [(img, "products/gallery/") for img in gallery_images]
 
-            return Response(ProductSerializer(product).data, status=201)
-        return Response(serializer.errors, status=400)
+        try:
+            urls = upload_files(jobs)
+        except Exception:
+            return Response({"error": "Image upload failed"}, status=502)
+
+        uploaded = dict(zip(
+            [field for field in image_fields if field in request.FILES],
+            urls
+        ))
+        gallery_urls = urls[len(uploaded):]
+
+        with transaction.atomic():
+            product = serializer.save(**uploaded)
+
+            # 🔹 Gallery rows in one INSERT
+            gallery = [
+                ProductImage(product=product, image_url=url)
+                for url in gallery_urls
+            ]
+            for image in gallery:
+                image.refresh_image_variants()
+            ProductImage.objects.bulk_create(gallery)
+
+        # bulk_create skips signals
+        invalidate_product_detail(product.slug)
+
+        product = (
+            Product.objects.select_related("category")
+            .prefetch_related("images")
+            .get(pk=product.pk)
+        )
+        return Response(ProductSerializer(product).data, status=201)
 
     def put(self, request):
         self.permission_classes = [IsAdminUser]
@@ -128,6 +194,129 @@ class ProductView(APIView):
         return Response({"message": "Deleted"})
 
 
+# ===================== BULK IMPORT / EXPORT =====================
+class ProductImportView(APIView):
+    """
+    POST a .csv or .jsonl file ("file"); rows are upserted by slug.
+    Returns counts plus a per-row error report.
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        file = request.FILES.get("file")
+
+        if not file:
+            return Response({"error": "file required"}, status=400)
+
+        name = file.name.lower()
+        if name.endswith(".csv"):
+            rows = iter_csv_rows(file)
+        elif name.endswith((".jsonl", ".ndjson")):
+            rows = iter_jsonl_rows(file)
+        else:
+            return Response({"error": "Only CSV or JSONL files allowed"}, status=400)
+
+        report = ProductImporter().run(rows)
+        return Response(report, status=200)
+
+
+class ProductExportView(APIView):
+    """
+    GET the whole catalog as a streamed download.
+    URL: /products/admin/export/?type=csv|jsonl
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        export_type = request.GET.get("type", "csv")
+
+        if export_type == "jsonl":
+            response = StreamingHttpResponse(
+                stream_jsonl(), content_type="application/x-ndjson"
+            )
+        elif export_type == "csv":
+            response = StreamingHttpResponse(stream_csv(), content_type="text/csv")
+        else:
+            return Response({"error": "type must be csv or jsonl"}, status=400)
+
+        response["Content-Disposition"] = f'attachment; filename="products.{export_type}"'
+        return response
+
+
+# ===================== AUTOCOMPLETE =====================
+class SuggestView(APIView):
+    """
+    GET typeahead suggestions from the in-memory prefix index
+    URL: /products/suggest/?q=sil&limit=8
+    """
+
+    # Public + hot path: skip the JWT user lookup
+    authentication_classes = []
+
+    def get(self, request):
+        query = request.GET.get("q", "")
+
+        try:
+            limit = min(int(request.GET.get("limit", SUGGEST_LIMIT)), 20)
+        except ValueError:
+            limit = SUGGEST_LIMIT
+
+        return Response(
+            {"query": query, "suggestions": suggest(query, max(limit, 1))},
+            status=status.HTTP_200_OK
+        )
+
+
+# ===================== CATEGORIES =====================
+class CategoryListView(APIView):
+    """
+    GET all categories with product counts (cached per catalog version)
+    """
+
+    def get(self, request):
+        data = get_category_list()
+
+        if data is None:
+            categories = Category.objects.annotate(
+                product_count=Count("products")
+            ).order_by("name")
+            data = CategorySerializer(categories, many=True).data
+            set_category_list(data)
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
+# ===================== FACETS =====================
+FACET_PARAMS = (
+    "category", "search", *FACET_FIELDS, "price_bucket",
+    "min_price", "max_price", "min_discount"
+)
+
+
+class FacetView(APIView):
+    """
+    GET filter counts (fabric, size, comfort, occasion, price buckets)
+    for the same filters ProductView accepts.
+    URL: /products/facets/?category=sarees&fabric=silk
+    """
+
+    def get(self, request):
+        params = {
+            key: request.GET[key].strip().lower()
+            for key in FACET_PARAMS
+            if request.GET.get(key, "").strip()
+        }
+
+        data = get_facets(params)
+        if data is None:
+            products = filter_products(Product.objects.all(), params)
+            data = compute_facets(products, params.get("search"))
+            set_facets(params, data)
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
 # ===================== BANNER =====================
 @method_decorator(csrf_exempt, name="dispatch")
 class BannerView(APIView):
@@ -141,7 +330,7 @@ class BannerView(APIView):
         data = request.data.copy()
 
         if "banner_image" in request.FILES:
-            data["banner_image"] = upload_to_cloudinary(
+            data["banner_image"] = upload_file(
                 request.FILES["banner_image"], "banners/"
             )
 
@@ -151,108 +340,186 @@ class BannerView(APIView):
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
 
-class HomeView(APIView):
-    def get(self, request):
-        # 🔹 Carousel images
-        carousel = list(
-            Carousel.objects.all()[:4].values(
-                "desktop_image",
-                "mobile_image"
-            )
+# ===================== HOME =====================
+HOME_PRODUCT_FIELDS = (
+    "name",
+    "price",
+    "mrp",
+    "discount",
+    "rating",
+    "main_image",
+    "hover_image",
+    "slug"
+)
+
+
+def build_home_payload():
+    # 🔹 Carousel images
+    carousel = list(
+        Carousel.objects.all()[:4].values(
+            "desktop_image",
+            "mobile_image",
+            srcset=F("image_variants")
         )
-
-        # 🔹 Top Picks products
-        top_picks = list(
-            Product.objects.filter(top_picks=True)
-            .order_by("-id")[:12]
-            .values(
-                "name",
-                "price",
-                "mrp",
-                "discount",
-                "rating",
-                "main_image",
-                "hover_image",
-                "slug"
-            )
+    )
+
+    # 🔹 Top Picks products
+    top_picks = list(
+        Product.objects.filter(top_picks=True)
+        .order_by("-id")[:12]
+        .values(*HOME_PRODUCT_FIELDS, srcset=F("image_variants"))
+    )
+
+    # 🔹 Trending (best sellers from the precomputed popularity table)
+    trending = list(
+        Product.objects.filter(popularity_score__gt=0)
+        .order_by(*POPULAR_SORT)[:TRENDING_LIMIT]
+        .values(*HOME_PRODUCT_FIELDS, srcset=F("image_variants"))
+    )
+
+    # 🔹 Homepage banners
+    banners = list(
+        Banner.objects.all().values(
+            "name",
+            "category",
+            "banner_image",
+            srcset=F("image_variants")
         )
-
-        # 🔹 Homepage banners
-        banners = list(
-            Banner.objects.all().values(
-                "name",
-                "category",
-                "banner_image"
+    )
+
+    # 🔹 Category-wise product grouping (for homepage sections)
+    # Newest 10 per banner category in ONE windowed query instead of one per banner
+    products_by_category = {
+        banner["category"]: [] for banner in banners if banner["category"]
+    }
+    banner_by_slug = {slugify(name): name for name in products_by_category}
+
+    if banner_by_slug:
+        ranked = (
+            Product.objects.filter(category__slug__in=list(banner_by_slug))
+            .annotate(
+                category_rank=Window(
+                    expression=RowNumber(),
+                    partition_by=[F("category_id")],
+                    order_by=F("id").desc()
+                )
             )
+            .filter(category_rank__lte=10)
+            .order_by("category_id", "-id")
+            .values("category__slug", *HOME_PRODUCT_FIELDS, srcset=F("image_variants"))
         )
 
-        # 🔹 Category-wise product grouping (for homepage sections)
-        products_by_category = {}
-
-        for banner in banners:
-            category = banner["category"]
-            if not category:
-                continue
-
-            products_by_category[category] = list(
-                Product.objects.filter(category=category)
-                .order_by("-id")[:10]
-                .values(
-                    "name",
-                    "price",
-                    "mrp",
-                    "discount",
-                    "rating",
-                    "main_image",
-                    "hover_image",
-                    "slug"
-                )
-            )
+        for row in ranked:
+            banner_category = banner_by_slug[row.pop("category__slug")]
+            products_by_category[banner_category].append(row)
+
+    return {
+        "carousel": carousel,
+        "top_picks": top_picks,
+        "trending": trending,
+        "banners": banners,
+        "products_by_category": products_by_category
+    }
+
+
+class HomeView(APIView):
+    """
+    Serves a pre-rendered JSON blob from cache; rebuilt on first hit after
+    a Product / Banner / Carousel change (see products.signals).
+    """
+
+    # Public, identical for everyone: skip the JWT user lookup
+    authentication_classes = []
+
+    def get(self, request):
+        payload = get_home_payload()
+
+        if payload is None:
+            payload = JSONRenderer().render(build_home_payload())
+            set_home_payload(payload)
+
+        return HttpResponse(payload, content_type="application/json", status=200)
+
+
+def build_product_detail(slug):
+    product = (
+        Product.objects.select_related("category")
+        .prefetch_related("images")
+        .filter(slug=slug)
+        .first()
+    )
+    if product is None:
+        return None
+    return ProductSerializer(product).data
+
 
-        return Response(
-            {
-                "carousel": carousel,
-                "top_picks": top_picks,
-                "banners": banners,
-                "products_by_category": products_by_category
-            },
-            status=200
-        )
-    
 class ProductDetailBySlug(APIView):
     """
     GET product details using slug
     URL: /products/products/<slug>/
+    Served through the two-tier detail cache (products.cache).
     """
 
     def get(self, request, slug):
-        try:
-            product = Product.objects.get(slug=slug)
-        except Product.DoesNotExist:
+        data = get_product_detail(slug, build_product_detail)
+
+        if data is None:
             return Response(
                 {"error": "Product not found"},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        serializer = ProductSerializer(product)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-    
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class SimilarProductsView(APIView):
+    """
+    GET the precomputed "you may also like" rail for a product
+    URL: /products/similar/<slug>/
+    """
+
+    def get(self, request, slug):
+        products = ProductListSerializer.optimize(
+            Product.objects.filter(similar_from__product__slug=slug)
+        ).order_by("similar_from__rank")
+
+        return Response(
+            ProductListSerializer(products, many=True).data,
+            status=status.HTTP_200_OK
+        )
+
+
+class ProductDetailCacheStats(APIView):
+    """
+    Hit / miss counters of this worker's product detail cache (for sizing)
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(product_detail_cache_stats(), status=status.HTTP_200_OK)
+
+
 class ProductDetailByCategory(APIView):
     """
-    GET products by category
+    GET products by category (slug or name, resolved through Category.slug)
     URL: /products/products/category/<category>/
     """
 
     def get(self, request, category):
-        products = Product.objects.filter(
-            category__iexact=category
-        ).order_by("-id")
+        fields = ProductListSerializer.parse_fields(request.GET.get("fields"))
+
+        products = list(
+            ProductListSerializer.optimize(
+                Product.objects.filter(category__slug=slugify(category)),
+                fields
+            ).order_by("-id")
+        )
 
-        if not products.exists():
+        if not products:
             return Response(
                 {"message": "No products found for this category"},
                 status=status.HTTP_200_OK
             )
 
-        serializer = ProductSerializer(products, many=True)
+        serializer = ProductListSerializer(products, many=True, fields=fields)
         return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_hot_query_indexes'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='ai_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', '-ai_score', '-created_at'], name='review_product_score_idx'),
+        ),
+    ]
@@ -17,12 +17,19 @@ class Review(models.Model):
 
     rating = models.IntegerField()  # 1 to 5
     comment = models.TextField(blank=True)
+    ai_score = models.FloatField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ("user", "product")
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["product", "-ai_score", "-created_at"],
+                name="review_product_score_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user} → {self.product} ({self.rating})"
@@ -3,6 +3,13 @@ ASGI config for saptrangi_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The order status stream (payments: order-status/<id>/stream/) only works
+when served through this module, e.g.
+
+    gunicorn saptrangi_backend.asgi:application -k uvicorn.workers.UvicornWorker
+
+Under WSGI (saptrangi_backend.wsgi) the stream endpoint answers 501.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 
     # Third-party
     "corsheaders",
@@ -107,6 +108,36 @@ REST_FRAMEWORK = {
     ),
 }
 
+# --------------------------------------------------
+# CATALOG PAGINATION
+# --------------------------------------------------
+
+CATALOG_PAGE_SIZE = int(os.environ.get("CATALOG_PAGE_SIZE", 24))
+CATALOG_MAX_PAGE_SIZE = int(os.environ.get("CATALOG_MAX_PAGE_SIZE", 100))
+
+# --------------------------------------------------
+# CHECKOUT
+# --------------------------------------------------
+
+# Unpaid online orders give their reserved stock back after this long
+STOCK_RESERVATION_TTL_MINUTES = int(os.environ.get("STOCK_RESERVATION_TTL_MINUTES", 30))
+
+# Idempotency-Key header on order / payment creation (see orders/idempotency.py)
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.environ.get("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", 10))
+
+# Order status streams (payments: order-status/<id>/stream/, ASGI only).
+# CacheStatusBackend shares events through CACHES across workers;
+# orders.status_events.LocalStatusBackend is enough for a single process.
+ORDER_EVENTS_BACKEND = os.environ.get(
+    "ORDER_EVENTS_BACKEND", "orders.status_events.CacheStatusBackend"
+)
+ORDER_EVENTS_POLL_SECONDS = float(os.environ.get("ORDER_EVENTS_POLL_SECONDS", 1))
+ORDER_EVENTS_KEEPALIVE_SECONDS = 15
+ORDER_EVENTS_STREAM_SECONDS = int(os.environ.get("ORDER_EVENTS_STREAM_SECONDS", 300))
+# Lifetime of the ?token= minted by order-status/<id>/stream-token/
+ORDER_EVENTS_TOKEN_SECONDS = int(os.environ.get("ORDER_EVENTS_TOKEN_SECONDS", 60))
+
 # --------------------------------------------------
 # JWT CONFIG
 # --------------------------------------------------
@@ -129,6 +160,24 @@ DATABASES = {
     )
 }
 
+# --------------------------------------------------
+# CACHE
+# --------------------------------------------------
+# Local memory by default (dev/tests); point CACHE_BACKEND/CACHE_LOCATION at
+# a shared backend in production so invalidations reach every worker.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "saptrangi"),
+    }
+}
+
+# Per-worker LRU in front of the shared cache for product detail pages
+PRODUCT_DETAIL_LRU_SIZE = int(os.environ.get("PRODUCT_DETAIL_LRU_SIZE", 512))
+
 # --------------------------------------------------
 # URLS & TEMPLATES
 # --------------------------------------------------
@@ -189,6 +238,10 @@ cloudinary.config(
     secure=True,
 )
 
+# Upload function used by the product/banner/carousel admin views: fn(file, folder) -> url
+MEDIA_UPLOADER = os.environ.get("MEDIA_UPLOADER", "products.uploads.upload_to_cloudinary")
+MEDIA_UPLOAD_WORKERS = int(os.environ.get("MEDIA_UPLOAD_WORKERS", 6))
+
 # --------------------------------------------------
 # DEFAULT PRIMARY KEY
 # --------------------------------------------------
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_admin'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otp',
+            index=models.Index(fields=['mobile', 'code', 'is_used', '-created_at'], name='otp_lookup_idx'),
+        ),
+    ]
@@ -64,6 +64,9 @@ class OTP(models.Model):
     class Meta:
         db_table = "otp_codes"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["mobile", "code", "is_used", "-created_at"], name="otp_lookup_idx"),
+        ]
 
     def is_expired(self):
         return timezone.now() > self.created_at + timedelta(minutes=5)